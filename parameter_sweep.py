@@ -0,0 +1,29 @@
+import pandas as pd
+from src.sweep import *
+import datetime
+
+if __name__ == '__main__':
+    #define the grid of simulation parameters to sweep, any key of DEFAULT_CONFIG can be swept
+    df = pd.read_csv('data/MOERS.csv')
+    grid = parameter_grid(
+        mode=['optimized'],
+        algorithm=['simulated_annealing', 'random_hill_climb', 'exact'],
+        schedule=['ExpDecay', 'GeomDecay'],
+        max_iters=[10, 100],
+        heat_rate=[5],
+        cool_rate=[10],
+        forecast_length=[12],
+    )
+    stop_above_baseline = True #True: stop optimized runs once they emit more CO2 than the baseline
+
+    #baseline for comparison
+    baseline_results = run_sweep(df, parameter_grid(mode=['baseline']), processes=1)
+    if stop_above_baseline:
+        for config in grid:
+            config['max_co2_lbs'] = baseline_results.total_co2_lbs.iloc[0]
+
+    #run every scenario in parallel across all cores and save the summary table
+    print(f'Running {len(grid)} simulations, started at {datetime.datetime.now()}')
+    results = pd.concat([run_sweep(df, grid), baseline_results], ignore_index=True)
+    results.to_csv('reports/parameter_sweep.csv', index=False)
+    print(results[['mode', 'algorithm', 'schedule', 'max_iters', 'total_co2_lbs', 'run_time_min', 'average_temp', 'wall_time_s', 'stopped_early']])
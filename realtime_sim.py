@@ -0,0 +1,38 @@
+import json
+import pandas as pd
+from src.refrigerator import *
+from src.utils import *
+from src.realtime import *
+
+async def main(moer_vector, n_fridges, n_ticks, budget_s, tick_s):
+    #replay the MOER data through the local stub feed, swap MOERClient's host/port for a live feed
+    async with StubMOERServer(moer_vector) as server:
+        client = MOERClient(server.host, server.port)
+        fridges = [Refrigerator(starting_temp=33+(i % 11)) for i in range(n_fridges)]
+        for fridge in fridges:
+            fridge.set_lapse_rates()
+        controller = RealtimeController(fridges, client, forecast_length=12, budget_s=budget_s)
+        state_matrix, temp_matrix = await controller.run(n_ticks, tick_s=tick_s)
+        await client.close()
+    return controller, state_matrix, temp_matrix
+
+if __name__ == '__main__':
+    #define simulation parameters, import and process MOER data
+    start_dt = '2019-03-01 00:00:00+00:00'
+    end_dt='2019-03-01 23:00:00+00:00'
+    n_fridges=100 #devices controlled concurrently
+    budget_s=0.05 #latency budget for each tick's decisions (s)
+    tick_s=None #300 for live 5 minute ticks, None to replay the data as fast as possible
+    df = prep_df(pd.read_csv('data/MOERS.csv'), start_dt=start_dt, end_dt=end_dt)
+    #the last hour needs its 12 step forecast
+    n_ticks = len(df)-11
+
+    controller, state_matrix, temp_matrix = run_async(main(df.MOER.values, n_fridges, n_ticks, budget_s, tick_s))
+
+    #decision latency and the carbon of the committed states
+    summary = controller.latency_summary()
+    summary['co2_lbs'] = float((state_matrix*df.MOER.values[:n_ticks, None]).sum()*(200/1000000)*(5/60))
+    summary['temp_range'] = [float(temp_matrix.min()), float(temp_matrix.max())]
+    print(json.dumps(summary, indent=2))
+    with open('reports/realtime_latency.json', 'w') as f:
+        json.dump(summary, f, indent=2)
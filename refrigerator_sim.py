@@ -3,18 +3,41 @@ import pandas as pd
 import numpy as np
 from src.refrigerator import *
 from src.utils import *
+from src.moer_store import *
 from src.optimization import *
+from src.receding_horizon import *
+from src.dynamic_programming import *
+from src.instrumentation import *
+from src.run_cache import *
+from src.robust import *
 import logging
 import datetime
 
 if __name__ == '__main__':
     #define simulation parameters, import and process MOER data
-    df = pd.read_csv('data/MOERS.csv')
     starting_temp=33
     start_dt = '2019-03-01 00:00:00+00:00'
     end_dt='2019-03-31 23:00:00+00:00'
+    moer_store_dir=None #directory of a MOERStore (see src/moer_store.py) to read only the simulated dates from, instead of the CSV
+    region=None #region (balancing authority) in the MOERStore
+    if moer_store_dir is None:
+        df = pd.read_csv('data/MOERS.csv')
+    else:
+        #last hour of the simulation needs its full 12 step forecast
+        df = MOERStore(moer_store_dir).to_df(region, start_dt, pd.Timestamp(end_dt)+pd.Timedelta(1,'h'))
     forecast_length=12 #number of time steps available in 1 hr perfect forecast
-    df=prep_df(df, start_dt=start_dt, end_dt=end_dt)
+    use_exact_solver=False #True: guaranteed optimal table lookup each hour, False: simulated annealing
+    use_receding_horizon=False #True: re-optimize at every 5 minute step instead of once per hour
+    use_fitness_cache=False #True: cache temperature feasibility of proposed states across hours (annealing only)
+    use_robust_forecast=False #True: optimize each hour against 1000 noisy forecast scenarios instead of the perfect forecast (not with use_receding_horizon)
+    run_global_optimum=False #True: also compute the whole-month minimum emission schedule as a lower bound
+    collect_metrics=False #True: time each phase of the optimized loop, saved to reports/metrics_optimized.json/.prom
+    run_cache_dir=None #directory of a RunCache (see src/run_cache.py) to reuse results of earlier runs, ex: 'data/run_cache'
+    if use_receding_horizon and use_robust_forecast:
+        raise ValueError('use_receding_horizon and use_robust_forecast can not both be True, pick one optimization mode')
+    df, forecast=prep_df(df, start_dt=start_dt, end_dt=end_dt, return_forecast=True)
+    run_cache = RunCache(run_cache_dir) if run_cache_dir else None
+    hours = pd.date_range(start=start_dt, end=end_dt, freq='h', tz='UTC')
 
     ###BASELINE SIMULATION
     #create log file for baseline simulation
@@ -22,13 +45,17 @@ if __name__ == '__main__':
     #instantiate the Refrigerator and set lapse rates for baseline simulation
     BaseLineFridge=Refrigerator(starting_temp=starting_temp, data=df.copy())
     BaseLineFridge.set_lapse_rates()
+    #everything that determines the simulated states, results of earlier runs with the same config and data (see data_key) are reused
+    baseline_config = {'mode':'baseline', 'region':region, 'starting_temp':starting_temp, 'start_dt':start_dt,
+                        'heat_rate':BaseLineFridge.heat_rate, 'cool_rate':BaseLineFridge.cool_rate}
+    n_restored = run_cache.restore(baseline_config, BaseLineFridge) if run_cache else 0
 
-    logging.info(f'Started Refrigerator simulation at {datetime.datetime.now()}')
-    #begin baseline (simple) simulation
-    for i in pd.date_range(start=start_dt, end=end_dt, freq='h', tz='UTC'):
+    logging.info(f'Started Refrigerator simulation at {datetime.datetime.now()} Cached steps: {n_restored}')
+    #begin baseline (simple) simulation, from the first hour not in the cache
+    for i in hours[n_restored//12:]:
         #for each period in 12 step forecast get MOER data and define the 'state' of the fridge across the periods
-        indexes = get_forecast_idxs(df, i, forecast_length=forecast_length)
-        moer_vect_hr = get_hr_forecast(df, indexes=indexes)
+        indexes = get_forecast_idxs(forecast, i, forecast_length=forecast_length)
+        moer_vect_hr = get_hr_forecast(forecast, indexes=indexes)
         base_line_state = baseline(fridge_temp=BaseLineFridge.current_temp)
 
         #caculate temperature change based on state across time periods, sum hourly MOER for logging, record state and temp data
@@ -37,6 +64,9 @@ if __name__ == '__main__':
         BaseLineFridge.record_data(indexes, base_line_state, fridge_temp_vector)
         logging.info(f"Current time stamp: {i} Best state: {base_line_state} Minimum MOER achieved: {MOER_hr} Max hour MOER: {moer_vect_hr.sum()} Fridge Temp: {BaseLineFridge.current_temp}")
 
+    if run_cache:
+        run_cache.save(baseline_config, BaseLineFridge)
+
     #create plots of simulation
     print('Baseline simulation results:')
     BaseLineFridge.report(file_path='reports/Refrigerator_Simulation_baseline.jpg')
@@ -49,40 +79,100 @@ if __name__ == '__main__':
     Fridge.set_lapse_rates()
 
     logging.info(f'Started Refrigerator simulation at {datetime.datetime.now()}')
+    #define parameters for simulated_annealing optimzation
+    algorithm = exact_search if use_exact_solver else mlrose.simulated_annealing
+    fitness_fn = FitnessCache() if use_fitness_cache else moer_min
+    metrics = Metrics(enabled=collect_metrics)
+    counted_fitness_fn = metrics.wrap_fitness(fitness_fn)
+    counted_batch_fitness_fn = metrics.wrap_batch_fitness(moer_min_batch)
+    algorithm_kwargs = {
+        'max_attempts':10,
+        'max_iters':10,
+        'random_state': 1,
+        'schedule':mlrose.ExpDecay(),
+        'curve':True
+            }
+    robust = RobustOptimizer(n_scenarios=1000, moer_noise=0.1, heat_noise=0.05, max_violation=0.05, random_state=1)
+    window_stats = []
+    mode = 'receding_horizon' if use_receding_horizon else 'robust' if use_robust_forecast else 'optimized'
+    optimized_config = dict(algorithm_kwargs, mode=mode, algorithm=algorithm,
+                            forecast_length=forecast_length, region=region, starting_temp=starting_temp, start_dt=start_dt,
+                            heat_rate=Fridge.heat_rate, cool_rate=Fridge.cool_rate)
+    n_restored = run_cache.restore(optimized_config, Fridge) if run_cache else 0
+    logging.info(f'Cached steps: {n_restored}')
+
     #begin optimzed simulation
-    for i in pd.date_range(start=start_dt, end=end_dt, freq='h', tz='UTC'):
-        #for each period in 12 step forecast get MOER forecast for each time step
-        indexes = get_forecast_idxs(df, i, forecast_length=forecast_length)
-        moer_vect_hr = get_hr_forecast(df, indexes=indexes)
+    if use_receding_horizon:
+        #re-optimize at every 5 minute step, committing only the first action of each solution
+        controller = RecedingHorizonController(forecast_length, algorithm=algorithm, algorithm_kwargs=algorithm_kwargs, fitness_fn=counted_fitness_fn, batch_fitness_fn=counted_batch_fitness_fn)
+        with metrics.timer('receding_horizon'):
+            state_vector, fridge_temp_vector = controller.run(Fridge, df.MOER.values[n_restored:])
+        with metrics.timer('record_data'):
+            Fridge.record_data(df.index[n_restored:], state_vector, fridge_temp_vector)
+        if metrics.enabled:
+            metrics.count('solves', controller.n_solves)
+            metrics.count('constraint_violations', sum(t < 33 or t > 43 for t in fridge_temp_vector))
+        logging.info(f"Receding horizon solves: {controller.n_solves} Solves per second: {controller.solves_per_second} Fridge Temp: {Fridge.current_temp}")
+    else:
+        for window, i in enumerate(hours[n_restored//forecast_length:], start=n_restored//forecast_length):
+            #for each period in 12 step forecast get MOER forecast for each time step
+            with metrics.timer('forecast_lookup'):
+                indexes = get_forecast_idxs(forecast, i, forecast_length=forecast_length)
+                moer_vect_hr = get_hr_forecast(forecast, indexes=indexes)
+
+            #define parameters for fitness/objective function to be used in optimization
+            fitness_func_kwargs = {
+                'moer_vector':moer_vect_hr, 
+                'fridge_temp':Fridge.current_temp, 
+                'heat_rate':Fridge.heat_rate, 
+                'cool_rate':Fridge.cool_rate
+                    }
+            #use simulation_anneling (or the exact table lookup) to optimze the fridge's state given the next 12 periods MOER forecast (minimizing MOER)
+            with metrics.timer('optimize'):
+                if use_robust_forecast:
+                    #expected MOER over the forecast scenarios, keeping the chance of leaving 33-43F <= 5%
+                    best_state, stats = robust.solve(window=window, **fitness_func_kwargs)
+                    best_fitness, curve = stats['expected'], [stats['expected']]
+                    window_stats.append(stats)
+                else:
+                    best_state, best_fitness, curve = optimize(forecast_length, counted_fitness_fn, algorithm, algorithm_kwargs=algorithm_kwargs, batch_fitness_fn=counted_batch_fitness_fn, **fitness_func_kwargs)
+            with metrics.timer('temperature'):
+                fridge_temp_vector = Fridge.calculate_fridge_temp_vector(best_state)
 
-        #define parameters for fitness/objective function to be used in optimization
-        fitness_func_kwargs = {
-            'moer_vector':moer_vect_hr, 
-            'fridge_temp':Fridge.current_temp, 
-            'heat_rate':Fridge.heat_rate, 
-            'cool_rate':Fridge.cool_rate
-                }
-        #define parameters for simulated_annealing optimzation    
-        algorithm_kwargs = {
-            'max_attempts':10,
-            'max_iters':10,
-            'random_state': 1,
-            'schedule':mlrose.ExpDecay(),
-            'curve':True
-                }
-        #use simulation_anneling to optimze the fridge's state given the next 12 periods MOER forecast (minimizing MOER)        
-        best_state, best_fitness, curve = optimize(forecast_length, moer_min, mlrose.simulated_annealing, algorithm_kwargs=algorithm_kwargs, **fitness_func_kwargs)
-        fridge_temp_vector = Fridge.calculate_fridge_temp_vector(best_state)
+            #record simuation data
+            with metrics.timer('record_data'):
+                Fridge.record_data(indexes, best_state, fridge_temp_vector)
+            if metrics.enabled:
+                metrics.count('hours')
+                metrics.count('optimizer_iterations', len(curve))
+                metrics.count('constraint_violations', sum(t < 33 or t > 43 for t in fridge_temp_vector))
+            logging.info(f"Current time stamp: {i} Best state: {best_state} Minimum MOER achieved: {best_fitness} Max hour MOER: {moer_vect_hr.sum()} Optimzation iterations: {len(curve)} Fridge Temp: {Fridge.current_temp}")
 
-        #record simuation data
-        Fridge.record_data(indexes, best_state, fridge_temp_vector)
-        logging.info(f"Current time stamp: {i} Best state: {best_state} Minimum MOER achieved: {best_fitness} Max hour MOER: {moer_vect_hr.sum()} Optimzation iterations: {len(curve)} Fridge Temp: {Fridge.current_temp}")
+    if run_cache:
+        run_cache.save(optimized_config, Fridge)
+    if use_fitness_cache:
+        logging.info(f'Fitness cache: {fitness_fn.cache_info()}')
+    if collect_metrics:
+        metrics.to_json('reports/metrics_optimized.json')
+        metrics.to_prometheus('reports/metrics_optimized.prom')
+        logging.info(f'Metrics: {metrics.summary()}')
 
     #create plots of simulation
     print('Optimized simulation results:')
     Fridge.report()
+    if window_stats:
+        #distribution of the total CO2 across the forecast scenarios
+        print(f'Forecast scenario CO2 (lbs): {robust_summary(window_stats, watts=Fridge.watts, minutes=Fridge.time_step_minutes)}')
     logging.info(f'Finished Simulation at {datetime.datetime.now()}')
 
-
-
-
+    ### GLOBAL OPTIMUM (lower bound for the online simulations)
+    if run_global_optimum:
+        GlobalFridge=Refrigerator(starting_temp=starting_temp, data=df.copy())
+        GlobalFridge.set_lapse_rates()
+        logging.info(f'Started global optimization at {datetime.datetime.now()}')
+        state_vector, _, total_moer = global_optimize(df.MOER.values, GlobalFridge)
+        fridge_temp_vector = GlobalFridge.calculate_fridge_temp_vector(state_vector)
+        GlobalFridge.record_data(df.index, state_vector, fridge_temp_vector)
+        logging.info(f'Finished global optimization at {datetime.datetime.now()} Minimum MOER achieved: {total_moer}')
+        print('Global optimum results:')
+        GlobalFridge.report(file_path='reports/Refrigerator_Simulation_global.jpg')
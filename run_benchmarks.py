@@ -0,0 +1,27 @@
+import argparse
+import matplotlib
+matplotlib.use('Agg')
+from src.benchmark import *
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the simulation hot paths on synthetic MOER data and flag regressions.')
+    parser.add_argument('--days', type=float, nargs='+', default=[1, 31], help='lengths of synthetic MOER data to benchmark, ex: 1 365 3650')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per micro benchmark, the best is kept')
+    parser.add_argument('--history', default='reports/benchmark_history.jsonl', help='machine readable history of benchmark runs')
+    parser.add_argument('--threshold', type=float, default=1.5, help='flag benchmarks slower than threshold x their recent median')
+    parser.add_argument('--no-annealing', action='store_true', help='skip the simulated annealing benchmarks')
+    parser.add_argument('--fail-on-regression', action='store_true', help='exit with status 1 if any regression is flagged')
+    args = parser.parse_args()
+
+    #compare against the history before adding this run to it
+    history = load_history(args.history)
+    results = run_benchmarks(days_list=args.days, repeat=args.repeat, include_annealing=not args.no_annealing)
+    regressions = find_regressions(results, history, threshold=args.threshold)
+    save_run(results, args.history)
+
+    for result in results:
+        print(f"{result['name']:<30} days={str(result['days']):<8} {result['seconds']:.6g} {result['unit']}")
+    for regression in regressions:
+        print(f"REGRESSION {regression['name']} days={regression['days']}: {regression['seconds']:.6g} vs {regression['baseline_seconds']:.6g} ({regression['ratio']:.2f}x)")
+    if regressions and args.fail_on_regression:
+        raise SystemExit(1)
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import tempfile
+import platform
+import datetime
+import subprocess
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from src.refrigerator import Refrigerator
+from src.utils import prep_df, get_forecast_idxs, get_hr_forecast
+from src.optimization import *
+from src.synthetic import synthetic_moer_df
+from src.sweep import run_scenario
+
+def time_call(fn, repeat=3):
+    """Best wall time (s) of fn() over repeat runs.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter()-start)
+    return best
+
+def _simulation_df(days):
+    """helper function for a prepped synthetic df covering days, plus its start and end hours
+    """
+    moer_df = synthetic_moer_df(days=days+1/24)
+    start_dt = moer_df.timestamp.iloc[0]
+    end_dt = start_dt + pd.Timedelta(days=days) - pd.Timedelta(hours=1)
+    df, forecast = prep_df(moer_df.copy(), start_dt=start_dt, end_dt=end_dt, return_forecast=True)
+    return moer_df, df, forecast, start_dt, end_dt
+
+def micro_benchmarks(repeat=3, n_calls=1000, include_annealing=True):
+    """Per call timings of the hot paths that don't depend on the simulation length.
+
+    Returns:
+        (list): dicts with 'name', 'days' (None), 'seconds' and 'unit'
+    """
+    rng = np.random.RandomState(1)
+    moer_vector = rng.uniform(500, 1500, 12)
+    states = rng.randint(0, 2, (n_calls, 12))
+    fridge = Refrigerator(starting_temp=38)
+    fridge.set_lapse_rates()
+    fitness_kwargs = {'moer_vector':moer_vector, 'fridge_temp':38, 'heat_rate':fridge.heat_rate, 'cool_rate':fridge.cool_rate}
+
+    def run_moer_min():
+        for state in states:
+            moer_min(state, **fitness_kwargs)
+
+    #shared across repeats, so the best time is the warm cache a long simulation sees
+    fitness_cache = FitnessCache()
+    def run_fitness_cache():
+        for state in states:
+            fitness_cache(state, **fitness_kwargs)
+
+    def run_temp_vector():
+        for state in states:
+            fridge.current_temp = 38
+            fridge.calculate_fridge_temp_vector(state)
+
+    def run_exact():
+        for _ in range(n_calls):
+            optimize(12, moer_min, exact_search, algorithm_kwargs={}, **fitness_kwargs)
+
+    timings = [
+        ('moer_min', time_call(run_moer_min, repeat)/n_calls),
+        ('fitness_cache', time_call(run_fitness_cache, repeat)/n_calls),
+        ('moer_min_batch', time_call(lambda: moer_min_batch(states, **fitness_kwargs), repeat)/n_calls),
+        ('calculate_fridge_temp_vector', time_call(run_temp_vector, repeat)/n_calls),
+        ('optimize_exact', time_call(run_exact, repeat)/n_calls),
+    ]
+    if include_annealing:
+        algorithm_kwargs = {'max_attempts':10, 'max_iters':10, 'random_state':1, 'schedule':mlrose.ExpDecay(), 'curve':True}
+        n_annealing = max(n_calls//10, 1)
+        def run_annealing():
+            for _ in range(n_annealing):
+                optimize(12, moer_min, mlrose.simulated_annealing, algorithm_kwargs=algorithm_kwargs, **fitness_kwargs)
+        def run_annealing_cached():
+            for _ in range(n_annealing):
+                optimize(12, fitness_cache, mlrose.simulated_annealing, algorithm_kwargs=algorithm_kwargs, **fitness_kwargs)
+        timings.append(('optimize_annealing', time_call(run_annealing, repeat)/n_annealing))
+        timings.append(('optimize_annealing_cached', time_call(run_annealing_cached, repeat)/n_annealing))
+    return [{'name':name, 'days':None, 'seconds':seconds, 'unit':'s/call'} for name, seconds in timings]
+
+def scaling_benchmarks(days, repeat=3, n_calls=100, include_annealing=True):
+    """Timings of the hot paths whose cost depends on the simulation length, and of the end-to-end simulations.
+
+    Args:
+        days (int/float): length of the synthetic MOER data, ex: 1 to 3650.
+
+    Returns:
+        (list): dicts with 'name', 'days', 'seconds' and 'unit'
+    """
+    moer_df, df, forecast, start_dt, end_dt = _simulation_df(days)
+    hours = pd.date_range(start=start_dt, end=end_dt, freq='h')
+    sample = hours[np.linspace(0, len(hours)-1, min(n_calls, len(hours))).astype(int)]
+    state_vector = np.ones(12, dtype=int)
+    temp_vector = list(np.linspace(43, 33, 12))
+
+    def run_forecast_idxs(moer_data):
+        for i in sample:
+            get_hr_forecast(moer_data, get_forecast_idxs(moer_data, i, forecast_length=12))
+
+    def run_record_data():
+        fridge = Refrigerator(starting_temp=33, data=df.copy())
+        for i in range(0, len(sample)*12, 12):
+            fridge.record_data(list(range(i, i+12)), state_vector, temp_vector)
+        fridge.data
+
+    def run_report():
+        fridge = Refrigerator(starting_temp=33, data=df.copy())
+        fridge.set_lapse_rates()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fridge.report(file_path=os.path.join(tmp_dir, 'report.jpg'))
+        plt.close('all')
+
+    scenario = {'start_dt':str(start_dt), 'end_dt':str(end_dt)}
+    timings = [
+        ('get_forecast_idxs_df', time_call(lambda: run_forecast_idxs(df), repeat)/len(sample), 's/call'),
+        ('get_forecast_idxs_forecast', time_call(lambda: run_forecast_idxs(forecast), repeat)/len(sample), 's/call'),
+        ('record_data', time_call(run_record_data, repeat)/len(sample), 's/call'),
+        ('report', time_call(run_report, 1), 's'),
+        ('simulation_baseline', time_call(lambda: run_scenario(dict(scenario, mode='baseline'), moer_df), 1), 's'),
+        ('simulation_exact', time_call(lambda: run_scenario(dict(scenario, algorithm='exact'), moer_df), 1), 's'),
+    ]
+    if include_annealing:
+        timings.append(('simulation_annealing', time_call(lambda: run_scenario(scenario, moer_df), 1), 's'))
+    return [{'name':name, 'days':days, 'seconds':seconds, 'unit':unit} for name, seconds, unit in timings]
+
+def run_benchmarks(days_list=(1,), repeat=3, include_annealing=True):
+    """Runs the micro benchmarks once and the scaling benchmarks for each length in days_list.
+
+    Returns:
+        (list): dicts with 'name', 'days', 'seconds' and 'unit'
+    """
+    results = micro_benchmarks(repeat=repeat, include_annealing=include_annealing)
+    for days in days_list:
+        results += scaling_benchmarks(days, repeat=repeat, include_annealing=include_annealing)
+    return results
+
+def load_history(history_path):
+    """Previous benchmark runs, oldest first (one JSON object per line).
+    """
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def save_run(results, history_path):
+    """Appends a benchmark run, with the commit and environment it ran in, to the history file.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    universal_newlines=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    run = {'time':datetime.datetime.now().isoformat(), 'commit':commit, 'python':platform.python_version(),
+            'numpy':np.__version__, 'pandas':pd.__version__, 'results':results}
+    os.makedirs(os.path.dirname(history_path) or '.', exist_ok=True)
+    with open(history_path, 'a') as f:
+        f.write(json.dumps(run)+'\n')
+    return run
+
+def find_regressions(results, history, threshold=1.5, window=5, min_runs=3):
+    """Benchmarks slower than threshold times the median of their last window runs in history. Timings of back to
+        back runs vary by several x on a busy machine, so a benchmark is only flagged once it has min_runs previous
+        timings and it is also slower than the slowest of them (outside the noise already seen).
+
+    Returns:
+        (list): the regressed result dicts, with 'baseline_seconds' and 'ratio' added
+    """
+    regressions = []
+    for result in results:
+        previous = [r['seconds'] for run in history[-window:] for r in run['results']
+                    if r['name']==result['name'] and r['days']==result['days']]
+        if len(previous) < min_runs:
+            continue
+        baseline_seconds = float(np.median(previous))
+        ratio = result['seconds']/baseline_seconds if baseline_seconds > 0 else np.inf
+        if ratio > threshold and result['seconds'] > max(previous):
+            regressions.append(dict(result, baseline_seconds=baseline_seconds, ratio=ratio))
+    return regressions
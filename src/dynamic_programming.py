@@ -0,0 +1,73 @@
+import numpy as np
+from src.state_table import to_ticks, TEMP_SCALE
+
+def _on_count_bounds(step, starting_ticks, heat_ticks, cool_ticks, min_ticks, max_ticks):
+    """helper function for the range of on-step counts that keep the temperature in range after step steps (all temps in ticks)
+    """
+    #temp after step steps with k of them on: starting_temp + heat_rate*(step-k) - cool_rate*k, exact in integer ticks
+    warmest = starting_ticks + heat_ticks*step
+    lo = -((max_ticks - warmest)//(heat_ticks+cool_ticks))
+    hi = (warmest - min_ticks)//(heat_ticks+cool_ticks)
+    return max(lo, 0), min(hi, step)
+
+def global_optimize(moer_vector, fridge, min_temp=33, max_temp=43):
+    """Finds the on/off schedule with the minimum total MOER over the whole simulation while keeping the
+        temperature within [min_temp, max_temp] at every step, by dynamic programming. Unlike the hourly
+        optimization it can pre-cool ahead of high MOER periods, so it gives a lower bound for online policies.
+
+        The temperature after t steps with k of them on is starting_temp + heat_rate*(t-k) - cool_rate*k, so the
+        DP states are the on-step counts k, which give the temperatures exactly (no quantization). Only a
+        handful of counts keep the temperature in range at each step, so time and memory are linear in len(moer_vector).
+
+    Args:
+        moer_vector (array): MOER data for every time step of the simulation, ex: prep_df(...).MOER.values
+        fridge (Refrigerator): refrigerator with lapse rates set, the schedule starts from its current temperature.
+            The fridge is not modified, replay the schedule with fridge.calculate_fridge_temp_vector(state_vector).
+        min_temp (int, optional): lowest allowed temperature. Defaults to 33.
+        max_temp (int, optional): highest allowed temperature. Defaults to 43.
+
+    Returns:
+        state_vector: (np.array) on/off state at each time step.
+        temp_vector: (np.array) temperature after each time step.
+        total_moer: (float) total MOER of the schedule (sum of MOER over the on steps).
+    """
+    moer_vector = np.asarray(moer_vector, dtype=np.float64)
+    n_steps = len(moer_vector)
+    #temperatures in fixed-point ticks, like Refrigerator
+    starting_ticks, heat_ticks, cool_ticks = to_ticks(fridge.current_temp), to_ticks(fridge.heat_rate), to_ticks(fridge.cool_rate)
+    min_ticks, max_ticks = to_ticks(min_temp), to_ticks(max_temp)
+
+    #cost[i] is the minimum MOER to reach on-count lo+i, came_on[t][i] whether the last step of that path was on
+    lo, cost = 0, np.zeros(1)
+    lows, came_on = [], []
+    for t in range(1, n_steps+1):
+        new_lo, new_hi = _on_count_bounds(t, starting_ticks, heat_ticks, cool_ticks, min_ticks, max_ticks)
+        counts = np.arange(new_lo, new_hi+1)
+        if len(counts) == 0:
+            raise ValueError(f'No schedule keeps the temperature in range at step {t}')
+
+        #reach count k either from k (off this step) or from k-1 (on this step)
+        prev_hi = lo + len(cost) - 1
+        off_cost = np.where((counts >= lo) & (counts <= prev_hi), cost[np.clip(counts-lo, 0, len(cost)-1)], np.inf)
+        on_cost = np.where((counts-1 >= lo) & (counts-1 <= prev_hi), cost[np.clip(counts-1-lo, 0, len(cost)-1)] + moer_vector[t-1], np.inf)
+        on = on_cost < off_cost
+        cost = np.where(on, on_cost, off_cost)
+        if np.isinf(cost).all():
+            raise ValueError(f'No schedule keeps the temperature in range at step {t}')
+
+        lo = new_lo
+        lows.append(lo)
+        came_on.append(on)
+
+    #backtrack from the cheapest final on-count (fewest on-steps on ties)
+    state_vector = np.zeros(n_steps, dtype=int)
+    count = lo + int(np.argmin(cost))
+    total_moer = cost.min() if n_steps else 0.0
+    for t in range(n_steps, 0, -1):
+        state_vector[t-1] = came_on[t-1][count-lows[t-1]]
+        count -= state_vector[t-1]
+
+    #temperatures follow from the cumulative on-count
+    on_counts = np.cumsum(state_vector)
+    temp_vector = (starting_ticks + heat_ticks*(np.arange(1, n_steps+1)-on_counts) - cool_ticks*on_counts)/TEMP_SCALE
+    return state_vector, temp_vector, total_moer
@@ -0,0 +1,156 @@
+import numpy as np
+from src.state_table import get_state_table, to_ticks, TEMP_SCALE
+
+class RefrigeratorFleet():
+    """Many smart refrigerators simulated together, stored as arrays (one entry per refrigerator).
+
+    Attributes:
+        starting_temp (np.array): temperature each refrigerator starts at
+        current_temp (np.array): current temperature of each refrigerator, kept as integer ticks like Refrigerator
+        running_time (np.array): minutes each refrigerator has been running
+        status (np.array): int8, 1 if the refrigerator ran during the last time step, 0 if not
+        watts (np.array): energy each refrigerator consumes while on
+        carbon (np.array): lbs of CO2 produced by each refrigerator so far
+        carbon_history (list): lbs of CO2 produced by the whole fleet at each simulated time step
+    """
+    def __init__(self, starting_temps, running_time=0, watts=200):
+        self.starting_temp = np.asarray(starting_temps, dtype=np.float64)
+        self.n_units = len(self.starting_temp)
+        self._temp_ticks = to_ticks(self.starting_temp)
+        self.running_time = np.broadcast_to(np.asarray(running_time, dtype=np.float64), (self.n_units,)).copy()
+        self.watts = np.broadcast_to(np.asarray(watts, dtype=np.float64), (self.n_units,)).copy()
+        self.status = np.zeros(self.n_units, dtype=np.int8)
+        self.carbon = np.zeros(self.n_units)
+        self.carbon_history = []
+
+    @property
+    def current_temp(self):
+        return self._temp_ticks/TEMP_SCALE
+
+    @current_temp.setter
+    def current_temp(self, temps):
+        self._temp_ticks = to_ticks(np.broadcast_to(temps, (self.n_units,)))
+
+    def set_lapse_rates(self, heat_rate=5, cool_rate=10, minutes=5):
+        """Define and calculate rate at which heat is lost and gained, per refrigerator (same rounding as Refrigerator).
+
+        Args:
+            heat_rate (int/array, optional): Deg per hour each refrigerator increases when not being cooled. Defaults to 5.
+            cool_rate (int/array, optional): Deg per hour each refrigerator decreases when being cooled. Defaults to 10.
+            minutes (int, optional): Number of minutes in each time step. Defaults to 5.
+        """
+        self.time_step_minutes = minutes
+        shape = (self.n_units,)
+        self.heat_rate = np.broadcast_to(np.round((np.asarray(heat_rate)/60)*minutes, 4), shape).copy()
+        self.cool_rate = np.broadcast_to(np.round((np.asarray(cool_rate)/60)*minutes, 4), shape).copy()
+        self._heat_ticks = to_ticks(self.heat_rate)
+        self._cool_ticks = to_ticks(self.cool_rate)
+
+        #group units by lapse rates once, units in a group share a StateTable when optimizing
+        rates = np.stack([self.heat_rate, self.cool_rate], axis=1)
+        self._unique_rates, group = np.unique(rates, axis=0, return_inverse=True)
+        group = np.asarray(group).ravel()
+        self._rate_groups = [np.flatnonzero(group==g) for g in range(len(self._unique_rates))]
+
+    def step(self, states, moer=None):
+        """Advances every refrigerator one time step: units with state 1 cool, units with state 0 heat.
+
+        Args:
+            states (array): on/off state for each refrigerator.
+            moer (float, optional): MOER for the time step, used to account for the carbon produced.
+
+        Returns:
+            (np.array): temperature of each refrigerator after the step.
+        """
+        on = np.asarray(states) == 1
+        self._temp_ticks = self._temp_ticks + np.where(on, -self._cool_ticks, self._heat_ticks)
+        self.status = on.astype(np.int8)
+        self.running_time += on*self.time_step_minutes
+
+        if moer is not None:
+            #MWH consumed by each unit during the step times lbs/MWH
+            carbon = on*(self.watts/1000000)*(self.time_step_minutes/60)*moer
+            self.carbon += carbon
+            self.carbon_history.append(carbon.sum())
+        return self.current_temp
+
+    def run(self, state_matrix, moer_vector=None):
+        """Applies a window of states to every refrigerator.
+
+        Args:
+            state_matrix (array): (n_units, n_steps) on/off states.
+            moer_vector (array, optional): MOER for each of the n_steps, used for carbon accounting.
+
+        Returns:
+            (np.array): (n_units, n_steps) temperature of each refrigerator after each step.
+        """
+        state_matrix = np.asarray(state_matrix)
+        temps = np.empty(state_matrix.shape)
+        for j in range(state_matrix.shape[1]):
+            temps[:, j] = self.step(state_matrix[:, j], None if moer_vector is None else moer_vector[j])
+        return temps
+
+    def optimize(self, moer_window, block_size=64):
+        """Finds the minimum MOER state vector over the window for every refrigerator at once. Refrigerators
+            sharing lapse rates share one StateTable: states are sorted by emissions once and each unit takes
+            the first state that is feasible from its current temperature, checking block_size states at a
+            time and only for the units still without a feasible state.
+
+        Args:
+            moer_window (array): MOER forecast for each time step in the window.
+            block_size (int, optional): number of sorted states checked per pass. Defaults to 64.
+
+        Returns:
+            (np.array): (n_units, len(moer_window)) best state vector for each refrigerator.
+        """
+        state_length = len(moer_window)
+        best_states = np.empty((self.n_units, state_length), dtype=np.int8)
+        for (heat_rate, cool_rate), units in zip(self._unique_rates, self._rate_groups):
+            table = get_state_table(state_length, float(heat_rate), float(cool_rate))
+            order = np.argsort(table.emissions(moer_window), kind='stable')
+            #exact feasibility in ticks, the same check as StateTable.feasible
+            lower, upper = table.lower_ticks[order], table.upper_ticks[order]
+            best = np.empty(len(units), dtype=np.int64)
+
+            remaining = np.arange(len(units))
+            for start in range(0, len(order), block_size):
+                temps = self._temp_ticks[units[remaining], None]
+                mask = (lower[start:start+block_size] <= temps) & (temps <= upper[start:start+block_size])
+                found = mask.any(axis=1)
+                best[remaining[found]] = order[start+mask[found].argmax(axis=1)]
+                remaining = remaining[~found]
+                if len(remaining) == 0:
+                    break
+
+            #units with no feasible state take the one with the smallest temperature violation
+            if len(remaining):
+                temps = self._temp_ticks[units[remaining], None]
+                violation = np.maximum(np.maximum(table.lower_ticks-temps, temps-table.upper_ticks), 0)
+                best[remaining] = violation.argmin(axis=1)
+            best_states[units] = table.states[best]
+        return best_states
+
+    def simulate(self, moer_vector, forecast_length=12):
+        """Optimizes and runs the whole fleet over moer_vector, one forecast window at a time.
+
+        Args:
+            moer_vector (array): MOER data for every time step of the simulation.
+            forecast_length (int, optional): number of time steps optimized and committed at a time. Defaults to 12.
+
+        Returns:
+            (np.array): total watts drawn by the fleet at each time step.
+        """
+        moer_vector = np.asarray(moer_vector, dtype=np.float64)
+        fleet_watts = np.empty(len(moer_vector))
+        for start in range(0, len(moer_vector), forecast_length):
+            window = moer_vector[start:start+forecast_length]
+            state_matrix = self.optimize(window)
+            self.run(state_matrix, window)
+            fleet_watts[start:start+len(window)] = self.watts @ state_matrix
+        return fleet_watts
+
+    @property
+    def total_carbon(self):
+        """lbs of CO2 produced by the whole fleet so far.
+        """
+        return self.carbon.sum()
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import numpy as np
+from contextlib import contextmanager
+from src.state_table import INFEASIBLE_FITNESS
+
+class _NullTimer():
+    """helper context manager that does nothing, shared by every disabled timer
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class Metrics():
+    """Per-phase timers and counters for a simulation run. When disabled, timer() returns a shared no-op
+        context manager and count() returns immediately, so instrumented loops cost next to nothing.
+
+    Attributes:
+        enabled (bool): whether timings and counts are collected.
+        timers (dict): phase name -> {'count', 'total_s', 'max_s'}
+        counters (dict): counter name -> value
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.timers = {}
+        self.counters = {}
+
+    def timer(self, name):
+        """Context manager timing the enclosed block as phase name. Ex: with metrics.timer('optimize'): ...
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timer(name)
+
+    @contextmanager
+    def _timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter()-start
+            timer = self.timers.setdefault(name, {'count':0, 'total_s':0.0, 'max_s':0.0})
+            timer['count'] += 1
+            timer['total_s'] += elapsed
+            timer['max_s'] = max(timer['max_s'], elapsed)
+
+    def count(self, name, n=1):
+        """Adds n to counter name.
+        """
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def wrap_fitness(self, fitness_fn):
+        """Wraps a fitness function (ex: moer_min) to count its calls ('fitness_calls') and the proposed states
+            that leave the temperature range ('infeasible_proposals'). Returns fitness_fn unchanged when disabled.
+        """
+        if not self.enabled:
+            return fitness_fn
+
+        def counted_fitness_fn(state, **kwargs):
+            fitness = fitness_fn(state, **kwargs)
+            self.count('fitness_calls')
+            if fitness == INFEASIBLE_FITNESS:
+                self.count('infeasible_proposals')
+            return fitness
+        return counted_fitness_fn
+
+    def wrap_batch_fitness(self, batch_fitness_fn):
+        """Wraps a batched fitness function (ex: moer_min_batch) like wrap_fitness, counting every row of each
+            population it scores. Returns batch_fitness_fn unchanged when disabled.
+        """
+        if not self.enabled:
+            return batch_fitness_fn
+
+        def counted_batch_fitness_fn(states, **kwargs):
+            fitness = batch_fitness_fn(states, **kwargs)
+            self.count('fitness_calls', len(fitness))
+            self.count('infeasible_proposals', int(np.count_nonzero(np.asarray(fitness) == INFEASIBLE_FITNESS)))
+            return fitness
+        return counted_batch_fitness_fn
+
+    def summary(self):
+        """Timers (with mean time per call) and counters as a dict.
+        """
+        timers = {name: dict(timer, mean_s=timer['total_s']/timer['count']) for name, timer in self.timers.items()}
+        return {'timers':timers, 'counters':dict(self.counters)}
+
+    def to_json(self, file_path):
+        """Saves summary() as JSON.
+        """
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        with open(file_path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def to_prometheus(self, file_path, prefix='refrigerator_sim'):
+        """Saves timers and counters in the Prometheus text exposition format (ex: for the node exporter textfile collector).
+        """
+        lines = []
+        if self.timers:
+            for metric, key, metric_type in (('phase_seconds_total', 'total_s', 'counter'),
+                                             ('phase_calls_total', 'count', 'counter'),
+                                             ('phase_seconds_max', 'max_s', 'gauge')):
+                lines.append(f'# TYPE {prefix}_{metric} {metric_type}')
+                lines += [f'{prefix}_{metric}{{phase="{name}"}} {timer[key]}' for name, timer in sorted(self.timers.items())]
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            lines.append(f'{prefix}_{name}_total {value}')
+
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        with open(file_path, 'w') as f:
+            f.write('\n'.join(lines)+'\n')
@@ -0,0 +1,127 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+#columns kept in the store and their on-disk dtypes
+STORE_COLUMNS = {'timestamp': 'int64', 'MOER': 'float64'}
+
+def _to_utc_ns(time_stamps):
+    """helper function to convert timestamps (naive ones are treated as UTC) to int64 UTC nanoseconds
+    """
+    return pd.to_datetime(pd.Series(time_stamps), utc=True).values.astype('int64')
+
+class MOERStore():
+    """Compact binary store of MOER data, one directory per region (balancing authority) holding a raw
+        file per column. Columns are memory-mapped, so date ranges can be read without loading the full history.
+
+    Attributes:
+        store_dir (str): directory of the store, created if needed.
+    """
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+
+    def regions(self):
+        """Names of the regions in the store.
+        """
+        return sorted(r for r in os.listdir(self.store_dir) if os.path.exists(self._meta_path(r)))
+
+    def _region_dir(self, region):
+        return os.path.join(self.store_dir, str(region))
+
+    def _meta_path(self, region):
+        return os.path.join(self._region_dir(region), 'meta.json')
+
+    def length(self, region):
+        """Number of time steps stored for region.
+        """
+        if not os.path.exists(self._meta_path(region)):
+            return 0
+        with open(self._meta_path(region)) as f:
+            return json.load(f)['length']
+
+    def append(self, region, time_stamps, moer):
+        """Appends MOER data to the end of a region's columns. Data must be sorted and later than what is stored.
+
+        Args:
+            region (str): region (balancing authority) name.
+            time_stamps (array): timestamps of each time step, naive timestamps are treated as UTC.
+            moer (array): MOER for each time step.
+        """
+        time_stamps = _to_utc_ns(time_stamps)
+        moer = np.asarray(moer, dtype=STORE_COLUMNS['MOER'])
+        if len(time_stamps) == 0:
+            return
+        if (np.diff(time_stamps) <= 0).any():
+            raise ValueError('MOER timestamps must be sorted and unique')
+        length = self.length(region)
+        if length and time_stamps[0] <= self.columns(region)['timestamp'][-1]:
+            raise ValueError(f'MOER data for {region} must be appended in time order')
+
+        os.makedirs(self._region_dir(region), exist_ok=True)
+        for column, values in (('timestamp', time_stamps), ('MOER', moer)):
+            with open(os.path.join(self._region_dir(region), f'{column}.bin'), 'ab') as f:
+                f.write(np.ascontiguousarray(values, dtype=STORE_COLUMNS[column]).tobytes())
+        with open(self._meta_path(region), 'w') as f:
+            json.dump({'length': length+len(time_stamps), 'columns': STORE_COLUMNS}, f)
+
+    def append_csv(self, csv_path, region=None, region_col=None, chunksize=100000):
+        """Converts a MOER CSV (columns 'timestamp' and 'MOER') into the store, reading it chunksize rows at a time.
+
+        Args:
+            csv_path (str): path of the CSV.
+            region (str, optional): region the whole CSV belongs to.
+            region_col (str, optional): column holding the region of each row, for CSVs with several regions.
+            chunksize (int, optional): number of rows read at a time. Defaults to 100000.
+        """
+        if (region is None) == (region_col is None):
+            raise ValueError('Provide exactly one of region or region_col')
+        usecols = ['timestamp', 'MOER'] + ([region_col] if region_col else [])
+        for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize):
+            if region_col is None:
+                self.append(region, chunk.timestamp.values, chunk.MOER.values)
+            else:
+                for chunk_region, rows in chunk.groupby(region_col, sort=False):
+                    self.append(chunk_region, rows.timestamp.values, rows.MOER.values)
+
+    def columns(self, region):
+        """Memory-mapped, read only columns of a region.
+
+        Returns:
+            (dict): {'timestamp': int64 UTC nanoseconds, 'MOER': float64} arrays
+        """
+        length = self.length(region)
+        if length == 0:
+            raise KeyError(f'{region} not in MOER store')
+        return {column: np.memmap(os.path.join(self._region_dir(region), f'{column}.bin'), dtype=dtype, mode='r', shape=(length,))
+                for column, dtype in STORE_COLUMNS.items()}
+
+    def window(self, region, start_dt, end_dt):
+        """Time stamps and MOER between start_dt and end_dt (inclusive), as views into the memory-mapped columns.
+
+        Returns:
+            time_stamps: (np.array) int64 UTC nanoseconds
+            moer: (np.array) MOER data
+        """
+        columns = self.columns(region)
+        start, end = _to_utc_ns([start_dt, end_dt])
+        lo = np.searchsorted(columns['timestamp'], start, side='left')
+        hi = np.searchsorted(columns['timestamp'], end, side='right')
+        return columns['timestamp'][lo:hi], columns['MOER'][lo:hi]
+
+    def to_df(self, region, start_dt, end_dt):
+        """MOER data between start_dt and end_dt (inclusive) as a df with 'timestamp' (UTC) and 'MOER', ready for prep_df.
+        """
+        time_stamps, moer = self.window(region, start_dt, end_dt)
+        return pd.DataFrame({'timestamp': pd.to_datetime(np.asarray(time_stamps), utc=True), 'MOER': np.asarray(moer)})
+
+    def iter_windows(self, region, start_dt, end_dt, window_length):
+        """Streams MOER between start_dt and end_dt in consecutive windows of window_length steps (the last may be shorter).
+
+        Yields:
+            time_stamps, moer: views into the memory-mapped columns for each window
+        """
+        time_stamps, moer = self.window(region, start_dt, end_dt)
+        for i in range(0, len(moer), window_length):
+            yield time_stamps[i:i+window_length], moer[i:i+window_length]
@@ -1,6 +1,8 @@
 import numpy as np
 import mlrose
 import warnings
+from collections import OrderedDict
+from src.state_table import exact_search, trajectory_ticks, to_ticks, in_range, INFEASIBLE_FITNESS, TEMP_SCALE
 
 def baseline(fridge_temp):
     if round(fridge_temp)==33:
@@ -28,27 +30,116 @@ def moer_min(state, moer_vector, fridge_temp, heat_rate, cool_rate):
     Returns:
         float: total MOER emissions at current state
     """
+    state = np.asarray(state)
 
-    #sum up total MOER from proposed state vector
-    moer_sum = sum(moer_vector*state)
+    #forecasted fridge temp (fixed-point ticks, like Refrigerator) for each time step in hour's proposed state vector
+    temp_ticks = to_ticks(fridge_temp) + trajectory_ticks(state, to_ticks(heat_rate), to_ticks(cool_rate))
 
-    #calculate forecasted fridge temp for each time step in hour's proposed state vector
-    for i in state:
-        if i ==0:
-            #fridge is off, so warm
-            fridge_temp += heat_rate
-            fridge_temp = round(fridge_temp,3)
+    #enforce temperature parameters:
+    if len(state) and (temp_ticks.max() > 43*TEMP_SCALE or temp_ticks.min() < 33*TEMP_SCALE):
+        return INFEASIBLE_FITNESS
+    #if temp parameters not exceded, return total MOER 
+    return np.dot(np.asarray(moer_vector, dtype=float), state)
 
-        elif i ==1: 
-            #fridge is on so cool
-            fridge_temp -= cool_rate
-            fridge_temp = round(fridge_temp,3)
+def moer_min_batch(states, moer_vector, fridge_temp, heat_rate, cool_rate):
+    """Batched version of moer_min that scores many state vectors in one NumPy pass.
 
-        #enforce temperature parameters:
-        if fridge_temp > 43 or fridge_temp < 33:
-            return 99999999999
-    #if temp parameters not exceded, return total MOER 
-    return moer_sum
+    Args:
+        states (np.array): (n_states, state_length) array of candidate binary on/off states.
+        moer_vector (array): array of moer data for each time step with same length of state.
+        fridge_temp (int/float): initial fridge temp at start of hour.
+        heat_rate (float): temp increase per time step while off.
+        cool_rate (float): temp decrease per time step while on.
+
+    Returns:
+        (np.array): total MOER emissions for each state, INFEASIBLE_FITNESS where the temp leaves [33, 43].
+    """
+    states = np.atleast_2d(states)
+    moer_sums = states @ np.asarray(moer_vector, dtype=float)
+
+    #temperature trajectories for all states at once, then check the bounds at every step
+    temp_ticks = to_ticks(fridge_temp) + trajectory_ticks(states, to_ticks(heat_rate), to_ticks(cool_rate))
+    return np.where(in_range(temp_ticks), moer_sums, INFEASIBLE_FITNESS)
+
+class FitnessCache():
+    """Memoizing drop-in replacement for moer_min (use it as the fitness_fn in optimize()). The temperature
+        feasibility of a state doesn't depend on MOER, so it is cached in a bounded LRU keyed on the state packed
+        into an integer bitmask and the quantized starting temp, and reused across hours. The MOER sum is a 
+        single dot product per call.
+
+    Attributes:
+        maxsize (int): maximum number of cached feasibility results.
+        temp_decimals (int): decimals the starting temp is quantized to (Refrigerator keeps temps to 4 decimals).
+        hits (int): number of calls answered from the cache.
+        misses (int): number of calls that had to check the temperature trajectory.
+    """
+    def __init__(self, maxsize=100000, temp_decimals=4):
+        self.maxsize = maxsize
+        self.temp_decimals = temp_decimals
+        self.hits = 0
+        self.misses = 0
+        self._feasible = OrderedDict()
+
+    def __call__(self, state, moer_vector, fridge_temp, heat_rate, cool_rate):
+        state = np.asarray(state, dtype=np.int64)
+        fridge_temp = round(fridge_temp, self.temp_decimals)
+        bitmask = int(np.bitwise_or.reduce(state << np.arange(len(state)))) if len(state) else 0
+        key = (bitmask, len(state), fridge_temp, heat_rate, cool_rate)
+
+        feasible = self._feasible.get(key)
+        if feasible is None:
+            self.misses += 1
+            #moer_min with zero MOER only checks the temperature trajectory
+            feasible = moer_min(state, np.zeros(len(state)), fridge_temp, heat_rate, cool_rate) != INFEASIBLE_FITNESS
+            self._feasible[key] = feasible
+            if len(self._feasible) > self.maxsize:
+                self._feasible.popitem(last=False)
+        else:
+            self.hits += 1
+            self._feasible.move_to_end(key)
+
+        return np.dot(moer_vector, state) if feasible else INFEASIBLE_FITNESS
+
+    @property
+    def hit_rate(self):
+        calls = self.hits + self.misses
+        return self.hits/calls if calls else 0
+
+    def cache_info(self):
+        """Hit/miss statistics, ex: for logging at the end of a simulation.
+        """
+        return {'hits':self.hits, 'misses':self.misses, 'hit_rate':self.hit_rate, 'size':len(self._feasible), 'maxsize':self.maxsize}
+
+    def clear(self):
+        self._feasible.clear()
+        self.hits = 0
+        self.misses = 0
+
+class BatchDiscreteOpt(mlrose.DiscreteOpt):
+    """mlrose DiscreteOpt problem that evaluates whole populations with a single call to a batched fitness function.
+        Used by population based algorithms (mlrose.genetic_alg, mlrose.mimic), single states still go through fitness_fn.
+
+    Attributes:
+        batch_fitness_fn: callable with the signature batch_fitness_fn(states, **kwargs), ex: moer_min_batch.
+                            kwargs are shared with fitness_fn (a mlrose.CustomFitness).
+    """
+    def __init__(self, length, fitness_fn, batch_fitness_fn, maximize=True, max_val=2):
+        mlrose.DiscreteOpt.__init__(self, length, fitness_fn, maximize=maximize, max_val=max_val)
+        self.batch_fitness_fn = batch_fitness_fn
+
+    def eval_pop_fitness(self, population):
+        """Fitness of every state in population, signed for maximization like eval_fitness.
+        """
+        return self.maximize*np.asarray(self.batch_fitness_fn(population, **self.fitness_fn.kwargs), dtype=float)
+
+    def set_population(self, new_population):
+        self.population = np.asarray(new_population)
+        self.pop_fitness = self.eval_pop_fitness(self.population)
+
+    def random_pop(self, pop_size):
+        if pop_size <= 0 or not float(pop_size).is_integer():
+            raise Exception("""pop_size must be a positive integer.""")
+        self.set_population(np.random.randint(0, self.max_val, (int(pop_size), self.length)))
 
 def initial_state(fridge_temp,state_length):
     """Sets state_vector inital condition for use in optimization algorithm using heuristics to potentially accelerate finding minimum. 
@@ -73,7 +164,7 @@ def initial_state(fridge_temp,state_length):
         init_state=None
     return init_state
 
-def optimize(state_length, fitness_fn, algorithm, algorithm_kwargs, **cust_fitness_fn_kwargs):
+def optimize(state_length, fitness_fn, algorithm, algorithm_kwargs, batch_fitness_fn=None, init_state=None, **cust_fitness_fn_kwargs):
     """Uses optimization techniques to identify binary state vector that minimizes fitness (MOER) over forecast period. 
 
     Args:
@@ -82,7 +173,13 @@ def optimize(state_length, fitness_fn, algorithm, algorithm_kwargs, **cust_fitne
         fitness_fn: callable Function for calculating fitness of a state with the signature fitness_fn(state, **kwargs)
         algorithm (mlrose optimization object): One of: mlrose.simulated_anneling, mlrose.random_hill_climb
                                     mlrose.hill_climb, mlrose.genetic_alg, or mlrose.mimic. See mlrose documentation for details. 
+                                    Can also be exact_search (moer_min only), which looks up the optimum in a 
+                                    precomputed table of every state and ignores algorithm_kwargs.
         algorithm_kwargs (dict): kwargs for mlrose optimization algorithims. 
+        batch_fitness_fn (optional): callable batch_fitness_fn(states, **kwargs) scoring a 2-D array of states at once, 
+                                    ex: moer_min_batch. Lets genetic_alg/mimic evaluate each generation in one call.
+        init_state (np.array, optional): starting state for the search, ex: a warm start from a previous solution. 
+                                    Defaults to the initial_state heuristic.
         
 
 
@@ -91,17 +188,34 @@ def optimize(state_length, fitness_fn, algorithm, algorithm_kwargs, **cust_fitne
         best_fitness: (float) Value of fitness (MOER) at best state. 
         curve: (array) Numpy array containing the fitness at every iteration. Must include in kwargs curve=True.
     """
+    #exact search needs no mlrose problem, every state is precomputed per (state_length, heat_rate, cool_rate)
+    if algorithm is exact_search:
+        return exact_search(state_length, **cust_fitness_fn_kwargs)
+
     #create custom fitness class using mlrose constructor
     cust_fitness_fn = mlrose.CustomFitness(fitness_fn, **cust_fitness_fn_kwargs)
 
-    #define problem using mlrose constructor
-    prob = mlrose.DiscreteOpt(length=state_length, 
-                                fitness_fn=cust_fitness_fn, 
-                                maximize=False, 
-                                max_val=2)
-
-    #set initial state using heuristic to accelerate optimization 
-    init_state = initial_state(cust_fitness_fn_kwargs.get('fridge_temp'),state_length=state_length)
+    #define problem using mlrose constructor (or the batched adapter for whole-population fitness)
+    if batch_fitness_fn is None:
+        prob = mlrose.DiscreteOpt(length=state_length, 
+                                    fitness_fn=cust_fitness_fn, 
+                                    maximize=False, 
+                                    max_val=2)
+    else:
+        prob = BatchDiscreteOpt(length=state_length, 
+                                    fitness_fn=cust_fitness_fn, 
+                                    batch_fitness_fn=batch_fitness_fn, 
+                                    maximize=False, 
+                                    max_val=2)
+
+    #population based algorithms start from a random population and take no initial state
+    if algorithm in (mlrose.genetic_alg, mlrose.mimic):
+        best_state, best_fitness, curve = algorithm(prob, **algorithm_kwargs)
+        return best_state, best_fitness, curve
+
+    #set initial state using heuristic to accelerate optimization, unless a warm start was given
+    if init_state is None:
+        init_state = initial_state(cust_fitness_fn_kwargs.get('fridge_temp'),state_length=state_length)
 
     #use mlrose optimization algo to find state vector with minimum MOER
     best_state, best_fitness, curve = algorithm(prob,init_state=init_state, **algorithm_kwargs)
@@ -0,0 +1,297 @@
+import json
+import math
+import time
+import asyncio
+import mlrose
+import numpy as np
+from src.optimization import moer_min
+from src.state_table import to_ticks
+
+def fallback_state(fridge_temp, heat_rate, cool_rate, state_length, max_temp=43):
+    """Thermostat-like state vector that stays off until the next step would pass max_temp, then cools.
+        It keeps the temperature in range without any search, so it is always a valid answer.
+    """
+    #fixed-point ticks, like Refrigerator
+    temp_ticks, heat_ticks, cool_ticks, max_ticks = to_ticks(fridge_temp), to_ticks(heat_rate), to_ticks(cool_rate), to_ticks(max_temp)
+    state = np.zeros(state_length, dtype=int)
+    for i in range(state_length):
+        if temp_ticks + heat_ticks > max_ticks:
+            state[i] = 1
+            temp_ticks -= cool_ticks
+        else:
+            temp_ticks += heat_ticks
+    return state
+
+def run_async(coroutine):
+    """Runs coroutine to completion on a new event loop and returns its result (asyncio.run is python 3.7+).
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+class AnytimeAnnealer():
+    """Simulated annealing with the same neighbourhood (one bit flip) and acceptance rule as mlrose.simulated_annealing,
+        that can be stopped after any iteration and always holds the best state found so far. Each annealer has its
+        own random generator, so many can run interleaved (ex: one per device) with reproducible results.
+
+        mlrose.simulated_annealing can't be used here: it runs a whole search in one call (until max_iters or
+        max_attempts), so it can neither stop at a deadline nor yield to the event loop, and it draws from the global
+        np.random state, so interleaved searches would not be reproducible. The fitness function (ex: moer_min),
+        the decay schedules and the feasible starting state are the same as the batch path's.
+
+    Attributes:
+        best_state (np.array): lowest fitness state found so far.
+        best_fitness (float): its fitness.
+        iters (int): iterations run so far.
+    """
+    def __init__(self, state_length, fitness_fn, schedule=None, init_state=None, random_state=None, **fitness_kwargs):
+        """
+        Args:
+            state_length (int): length of the state vector, ex: 12 for a 1 hr forecast.
+            fitness_fn: fitness function to minimize with the signature fitness_fn(state, **fitness_kwargs), ex: moer_min.
+            schedule (optional): mlrose decay schedule, anything with evaluate(iters). Defaults to mlrose.ExpDecay().
+            init_state (array, optional): starting state. Defaults to fallback_state, so the answer is feasible from the start.
+            random_state (int/list, optional): seed, ex: [seed, tick, device]. Defaults to None.
+            **fitness_kwargs: fitness_fn kwargs, ex: moer_vector, fridge_temp, heat_rate, cool_rate.
+        """
+        self.fitness_fn = fitness_fn
+        self.fitness_kwargs = fitness_kwargs
+        self.schedule = mlrose.ExpDecay() if schedule is None else schedule
+        self.rng = np.random.default_rng(random_state)
+        if init_state is None:
+            init_state = fallback_state(fitness_kwargs['fridge_temp'], fitness_kwargs['heat_rate'], fitness_kwargs['cool_rate'], state_length)
+        self.state = np.array(init_state, dtype=int)
+        self.fitness = fitness_fn(self.state, **fitness_kwargs)
+        self.best_state, self.best_fitness = self.state.copy(), self.fitness
+        self.iters = 0
+
+    def run(self, n_iters):
+        """Runs n_iters more iterations.
+
+        Returns:
+            (np.array): best state found so far
+        """
+        #random numbers for the whole chunk at once
+        flips = self.rng.integers(len(self.state), size=n_iters)
+        uniforms = self.rng.random(n_iters)
+        for flip, uniform in zip(flips, uniforms):
+            temp = self.schedule.evaluate(self.iters)
+            self.iters += 1
+            if temp == 0:
+                break
+            next_state = self.state.copy()
+            next_state[flip] = 1-next_state[flip]
+            next_fitness = self.fitness_fn(next_state, **self.fitness_kwargs)
+
+            #minimizing, so improvements have a positive delta
+            delta_e = self.fitness-next_fitness
+            if delta_e > 0 or uniform < math.exp(min(delta_e/temp, 0)):
+                self.state, self.fitness = next_state, next_fitness
+                if next_fitness < self.best_fitness:
+                    self.best_state, self.best_fitness = next_state, next_fitness
+        return self.best_state
+
+    def run_until(self, deadline, check_every=10):
+        """Runs until time.perf_counter() passes deadline, checking the clock every check_every iterations.
+
+        Returns:
+            (np.array): best state found so far
+        """
+        while time.perf_counter() < deadline:
+            self.run(check_every)
+        return self.best_state
+
+class StubMOERServer():
+    """Local stand-in for a live MOER feed, for testing. Replays a MOER series over TCP with a JSON line protocol:
+        a request {"tick": i, "n": n} is answered with {"tick": i, "moer": [n values from step i]}, or {"error": ...}.
+
+    Attributes:
+        moer_vector (np.array): MOER data replayed, one value per 5 minute tick.
+        host (str): address served on.
+        port (int): port served on (a free port is picked when 0, set once started).
+    """
+    def __init__(self, moer_vector, host='127.0.0.1', port=0):
+        self.moer_vector = np.asarray(moer_vector, dtype=float)
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                tick, n = int(request['tick']), int(request['n'])
+                if not 0 <= tick < len(self.moer_vector):
+                    response = {'error': f'tick {tick} out of range'}
+                else:
+                    response = {'tick': tick, 'moer': self.moer_vector[tick:tick+n].tolist()}
+                writer.write((json.dumps(response)+'\n').encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+class MOERClient():
+    """Client for a MOER feed speaking the StubMOERServer protocol, keeping one connection open.
+
+    Attributes:
+        host (str): feed address.
+        port (int): feed port.
+    """
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader, self._writer = None, None
+        self._lock = asyncio.Lock()
+
+    async def forecast(self, tick, n):
+        """MOER forecast for the n steps starting at tick (shorter at the end of the feed).
+
+        Returns:
+            (np.array): MOER values
+        """
+        #one request in flight at a time on the shared connection
+        async with self._lock:
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._writer.write((json.dumps({'tick': tick, 'n': n})+'\n').encode())
+            await self._writer.drain()
+            response = json.loads(await self._reader.readline())
+        if 'error' in response:
+            raise ValueError(response['error'])
+        return np.asarray(response['moer'], dtype=float)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            #StreamWriter.wait_closed is python 3.7+
+            if hasattr(self._writer, 'wait_closed'):
+                await self._writer.wait_closed()
+            self._reader, self._writer = None, None
+
+class RealtimeController():
+    """Drives a set of refrigerators from a live MOER feed. At each 5 minute tick it fetches the forecast once,
+        then searches a state for every device concurrently with AnytimeAnnealer, interleaved on the event loop
+        (control returns to the loop every check_every iterations) and stopped at the tick's latency budget.
+        The first action of each device's best state is committed (receding horizon).
+
+    Attributes:
+        fridges (list): Refrigerator objects, with lapse rates set.
+        source: MOER feed with an async forecast(tick, n) method, ex: MOERClient.
+        forecast_length (int): forecast steps searched over at each tick.
+        budget_s (float): latency budget (s) from the start of a tick to the decisions.
+        latencies (list): decision latency (s) of every device at every tick.
+        states (list): committed state of every device at each tick.
+        temps (list): temperature of every device after each tick.
+    """
+    def __init__(self, fridges, source, forecast_length=12, budget_s=0.05, schedule=None, random_state=1, check_every=10):
+        self.fridges = fridges
+        self.source = source
+        self.forecast_length = forecast_length
+        self.budget_s = budget_s
+        self.schedule = schedule
+        self.random_state = random_state
+        self.check_every = check_every
+        self.latencies = []
+        self._round_s = 0.0
+        self.states = []
+        self.temps = []
+
+    async def decide(self, fridge, moer_window, tick_start, deadline, seed):
+        """Best state found for fridge by the deadline, yielding to the event loop between chunks of iterations.
+            The search stops when another round of chunks (this device's and the other devices') would pass the deadline,
+            starting from the round time measured at the previous tick.
+
+        Returns:
+            best_state: (np.array) best state found.
+            latency: (float) seconds from the start of the tick to the decision.
+        """
+        annealer = AnytimeAnnealer(len(moer_window), moer_min, schedule=self.schedule, random_state=seed,
+                                    moer_vector=moer_window, fridge_temp=fridge.current_temp,
+                                    heat_rate=fridge.heat_rate, cool_rate=fridge.cool_rate)
+        #let every device build its annealer before the first round
+        await asyncio.sleep(0)
+        now, round_s = time.perf_counter(), self._round_s
+        while now + round_s < deadline:
+            annealer.run(self.check_every)
+            await asyncio.sleep(0)
+            round_s, now = time.perf_counter()-now, time.perf_counter()
+            self._round_s = round_s
+        return annealer.best_state, time.perf_counter()-tick_start
+
+    async def step(self, tick):
+        """Fetches the forecast at tick, decides and commits the next action of every device.
+
+        Returns:
+            (np.array): committed state of each device
+        """
+        tick_start = time.perf_counter()
+        deadline = tick_start + self.budget_s
+        moer_window = await self.source.forecast(tick, self.forecast_length)
+        #seeded per tick and device, so runs are reproducible given the same number of iterations
+        seeds = [None if self.random_state is None else [self.random_state, tick, i] for i in range(len(self.fridges))]
+        decisions = await asyncio.gather(*(self.decide(fridge, moer_window, tick_start, deadline, seed)
+                                            for fridge, seed in zip(self.fridges, seeds)))
+
+        states = np.array([best_state[0] for best_state, _ in decisions], dtype=int)
+        for fridge, state in zip(self.fridges, states):
+            fridge.calculate_fridge_temp_vector(state[None])
+        self.latencies += [latency for _, latency in decisions]
+        self.states.append(states)
+        self.temps.append(np.array([fridge.current_temp for fridge in self.fridges]))
+        return states
+
+    async def run(self, n_ticks, start_tick=0, tick_s=None):
+        """Runs n_ticks ticks. With tick_s set, each tick starts tick_s seconds after the previous one
+            (ex: 300 for live operation), otherwise ticks run back to back (ex: replaying a day of MOER data).
+
+        Returns:
+            state_matrix: (np.array) committed states, shape (n_ticks, n_devices).
+            temp_matrix: (np.array) temperatures after each tick, shape (n_ticks, n_devices).
+        """
+        loop = asyncio.get_event_loop()
+        next_tick = loop.time()
+        for tick in range(start_tick, start_tick+n_ticks):
+            if tick_s is not None:
+                await asyncio.sleep(max(next_tick-loop.time(), 0))
+                next_tick += tick_s
+            await self.step(tick)
+        return np.array(self.states[-n_ticks:]), np.array(self.temps[-n_ticks:])
+
+    def latency_summary(self):
+        """Decision latency percentiles (ms) and the share of decisions that missed the budget.
+        """
+        latencies = np.asarray(self.latencies)*1000
+        if len(latencies) == 0:
+            return {}
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        return {
+            'decisions': len(latencies),
+            'p50_ms': p50,
+            'p90_ms': p90,
+            'p99_ms': p99,
+            'max_ms': latencies.max(),
+            'budget_ms': self.budget_s*1000,
+            'missed_budget': float(np.mean(latencies > self.budget_s*1000)),
+        }
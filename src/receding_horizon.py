@@ -0,0 +1,105 @@
+import time
+import numpy as np
+from src.optimization import *
+from src.state_table import exact_search, get_state_table
+
+class RecedingHorizonController():
+    """Re-optimizes the forecast window at every time step and commits only the first action of the solution.
+
+    Attributes:
+        forecast_length (int): number of time steps in the forecast window solved at each step.
+        algorithm: exact_search or one of the mlrose algorithms accepted by optimize().
+        algorithm_kwargs (dict): kwargs for the mlrose algorithm, ignored by exact_search.
+        fitness_fn: fitness function passed to optimize(), moer_min or a FitnessCache.
+        batch_fitness_fn (optional): batched fitness passed to optimize(), ex: moer_min_batch.
+        block_size (int): number of windows whose emissions exact_search computes in one matrix product.
+        n_solves (int): number of windows solved so far.
+        solve_time (float): seconds spent solving windows so far.
+    """
+    def __init__(self, forecast_length=12, algorithm=exact_search, algorithm_kwargs=None, fitness_fn=moer_min, batch_fitness_fn=None, block_size=288):
+        self.forecast_length = forecast_length
+        self.algorithm = algorithm
+        self.algorithm_kwargs = algorithm_kwargs if algorithm_kwargs is not None else {}
+        self.fitness_fn = fitness_fn
+        self.batch_fitness_fn = batch_fitness_fn
+        self.block_size = block_size
+        self.previous_state = None
+        self.n_solves = 0
+        self.solve_time = 0
+
+    @property
+    def solves_per_second(self):
+        return self.n_solves/self.solve_time if self.solve_time > 0 else 0
+
+    def warm_start(self, state_length):
+        """Previous solution shifted forward by one step, repeating its last action to fill the new final step.
+
+        Returns:
+            (np.array): initial state for the next window, or None if there is no previous solution.
+        """
+        if self.previous_state is None:
+            return None
+        shifted = np.append(self.previous_state[1:], self.previous_state[-1])
+        return shifted[:state_length].astype(int)
+
+    def solve(self, moer_window, fridge_temp, heat_rate, cool_rate):
+        """Optimizes one forecast window, warm-started from the previous solution.
+
+        Returns:
+            (np.array): best state vector for the window.
+        """
+        start = time.perf_counter()
+        best_state, best_fitness, curve = optimize(len(moer_window), self.fitness_fn, self.algorithm,
+                                                    algorithm_kwargs=self.algorithm_kwargs,
+                                                    batch_fitness_fn=self.batch_fitness_fn,
+                                                    init_state=self.warm_start(len(moer_window)),
+                                                    moer_vector=moer_window, fridge_temp=fridge_temp,
+                                                    heat_rate=heat_rate, cool_rate=cool_rate)
+        self.solve_time += time.perf_counter()-start
+        self.n_solves += 1
+        self.previous_state = np.asarray(best_state)
+        return self.previous_state
+
+    def run(self, fridge, moer_vector):
+        """Simulates the refrigerator over moer_vector, re-solving at every step and committing the first action.
+            With exact_search, the emissions of a whole block of overlapping windows are computed at once and
+            each step only applies the feasibility mask for the current temperature.
+
+        Args:
+            fridge (Refrigerator): refrigerator with lapse rates set, its temperature is advanced step by step.
+            moer_vector (array): MOER data for every time step of the simulation.
+
+        Returns:
+            state_vector: (np.array) committed on/off state at each time step.
+            temp_vector: (list) fridge temperature after each time step.
+        """
+        moer_vector = np.asarray(moer_vector, dtype=float)
+        n_steps = len(moer_vector)
+        state_vector = np.zeros(n_steps, dtype=int)
+        temp_vector = []
+        block_emissions, block_start = None, 0
+        #lapse rates don't change during a run, one table serves every block
+        table = get_state_table(self.forecast_length, fridge.heat_rate, fridge.cool_rate) if self.algorithm is exact_search else None
+
+        for step in range(n_steps):
+            window = moer_vector[step:step+self.forecast_length]
+            full_window = len(window) == self.forecast_length
+
+            if self.algorithm is exact_search and full_window:
+                #reuse emissions of the overlapping windows computed for the current block
+                start = time.perf_counter()
+                if block_emissions is None or step-block_start >= len(block_emissions):
+                    block_start = step
+                    block_emissions = table.window_emissions(moer_vector[step:step+self.block_size+self.forecast_length-1])
+                best_state, _ = table.best(block_emissions[step-block_start], fridge.current_temp)
+                self.solve_time += time.perf_counter()-start
+                self.n_solves += 1
+                self.previous_state = best_state
+            else:
+                best_state = self.solve(window, fridge.current_temp, fridge.heat_rate, fridge.cool_rate)
+
+            #commit only the first action
+            state_vector[step] = best_state[0]
+            temp_vector += fridge.calculate_fridge_temp_vector(best_state[:1])
+
+        return state_vector, temp_vector
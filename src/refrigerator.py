@@ -1,5 +1,9 @@
-import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import seaborn as sns
+from src.state_table import to_ticks, TEMP_SCALE
 
 class Refrigerator():
     """A smart refrigerator.
@@ -7,17 +11,48 @@ class Refrigerator():
     Attributes:
         starting_temp (int): temperature the refrigerator starts at
         data (pd.DataFrame()): If provided, a df with time stamps, emissions data. 
-                                Used to record and report simulation data. 
+                                Used to record and report simulation data. Recorded status/temps are 
+                                buffered in typed arrays and written into the df when it is accessed.
+                                Running totals of the recorded steps are kept as they are recorded, see running_totals.
         running_time (int): default=0, time the refrigerator has been running
         watts(float/int): default=200, energy refrigerator consumes while on
+        current_temp (float): current temperature, kept as integer ticks of 1/TEMP_SCALE deg so it never drifts
     """
+    #fixed attribute layout, no per-instance __dict__
+    __slots__ = ('starting_temp', '_temp_ticks', 'running_time', 'watts', 'status', 'time_step_minutes',
+                 'heat_rate', 'cool_rate', '_heat_ticks', '_cool_ticks', '_heat_steps', 'data_to_plot',
+                 '_data', '_status_buffer', '_temp_buffer', '_moer', '_recorded', '_unflushed',
+                 '_steps', '_on_steps', '_on_moer', '_temp_sum', '_min_temp', '_max_temp')
+
     def __init__(self, starting_temp, data=None, running_time=0, watts=200):
         self.starting_temp = starting_temp
         self.current_temp = starting_temp
         self.running_time = running_time
         self.data = data
         self.watts = watts 
+
+    @property
+    def current_temp(self):
+        return self._temp_ticks/TEMP_SCALE
+
+    @current_temp.setter
+    def current_temp(self, temp):
+        self._temp_ticks = to_ticks(temp)
     
+    @property
+    def data(self):
+        if self._unflushed:
+            self.flush_data()
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._status_buffer = None
+        self._temp_buffer = None
+        self._unflushed = False
+        self._reset_totals()
+
     def set_lapse_rates(self, heat_rate=5, cool_rate=10, minutes=5):
         """Define and calculate rate at which heat is lost and gained
 
@@ -30,22 +65,24 @@ class Refrigerator():
         self.time_step_minutes=minutes
         self.heat_rate = round((heat_rate/60)*self.time_step_minutes,4) #temp increse per 5 minutes off
         self.cool_rate = round((cool_rate/60)*self.time_step_minutes,4) #temp decrease per 5 minutes on 
+        self._heat_ticks = to_ticks(self.heat_rate)
+        self._cool_ticks = to_ticks(self.cool_rate)
+        #heat_ticks*t for t = 1, 2, ..., grown as longer state vectors come in
+        self._heat_steps = self._heat_ticks*np.arange(1, 13, dtype=np.int64)
         
     
     def cool(self, minutes=5):
         """Runs the Refrigerator for 5 minute step, decreases the temperature at the given rate, 
             and keeps a running time count.
         """
-        self.current_temp -= self.cool_rate
-        self.current_temp = round(self.current_temp,4)
+        self._temp_ticks -= self._cool_ticks
         self.status = 1
         self.running_time += self.time_step_minutes
 
     def heat(self):
         """Shuts off the Refrigerator and increases temperature. 
         """
-        self.current_temp += self.heat_rate
-        self.current_temp = round(self.current_temp,4)
+        self._temp_ticks += self._heat_ticks
         self.status = 0
     
     def calculate_fridge_temp_vector(self, state_vector):
@@ -58,17 +95,20 @@ class Refrigerator():
         Returns:
             (list): series of temps at each step for the state vector. Ex: [34,36,39,36]
         """
-        fridge_temp_vector = []
-        for i in state_vector:
-            if i==0:
-                #fridge is off, so it warms
-                self.heat()
-                fridge_temp_vector.append(self.current_temp)
-            else:
-                #fridge is on so cool
-                self.cool()
-                fridge_temp_vector.append(self.current_temp)
-        return fridge_temp_vector
+        #any non zero state runs the fridge
+        on = np.asarray(state_vector) != 0
+        if len(on) == 0:
+            return []
+
+        #closed form from the cumulative count of on steps k (see trajectory_ticks): heat*t - (heat+cool)*k, in ticks
+        on_counts = on.cumsum(dtype=np.int64)
+        if len(on) > len(self._heat_steps):
+            self._heat_steps = self._heat_ticks*np.arange(1, 2*len(on)+1, dtype=np.int64)
+        temp_ticks = self._temp_ticks + self._heat_steps[:len(on)] - (self._heat_ticks+self._cool_ticks)*on_counts
+        self._temp_ticks = int(temp_ticks[-1])
+        self.running_time += int(on_counts[-1])*self.time_step_minutes
+        self.status = int(on[-1])
+        return (temp_ticks/TEMP_SCALE).tolist()
 
     def record_data(self, indexes, state_vector, temp_vector):
         """Records the status (on/off), and the temperature of the refridgerator at each time step in the state_vector.
@@ -79,8 +119,100 @@ class Refrigerator():
                                                 turning off, turning on, turing off, turning on... in that sequence.
             temp_vect (list, np.array): series of temps at each step for the state/series. Ex: [34,36,39,36] 
         """
-        self.data.loc[indexes, 'status']=state_vector
-        self.data.loc[indexes, 'recorded_temp']=temp_vector
+        if self._status_buffer is None:
+            self._init_buffers()
+
+        #df indexes are the row positions after prep_df, otherwise look them up
+        if isinstance(self._data.index, pd.RangeIndex) and self._data.index.start==0 and self._data.index.step==1:
+            positions = np.asarray(indexes)
+        else:
+            positions = self._data.index.get_indexer(indexes)
+            if (positions < 0).any():
+                raise KeyError('indexes not in data')
+
+        overwrite = self._recorded[positions].any()
+        self._status_buffer[positions]=state_vector
+        self._temp_buffer[positions]=temp_vector
+        self._unflushed = True
+
+        if overwrite:
+            #rare, recount everything so replaced steps don't linger in the totals
+            self._recorded[positions]=True
+            self._recount_totals()
+        else:
+            self._recorded[positions]=True
+            self._add_to_totals(positions, np.asarray(state_vector, dtype=np.float64), np.asarray(temp_vector, dtype=np.float64))
+
+    def _init_buffers(self):
+        """helper function to preallocate the typed arrays record_data writes into, starting from any existing data
+        """
+        n = len(self._data)
+        self._status_buffer = self._data['status'].values.astype(np.int8) if 'status' in self._data else np.zeros(n, dtype=np.int8)
+        self._temp_buffer = self._data['recorded_temp'].values.astype(np.float32) if 'recorded_temp' in self._data else np.zeros(n, dtype=np.float32)
+        self._moer = self._data['MOER'].values.astype(np.float64) if 'MOER' in self._data else np.zeros(n)
+        #only steps written by record_data count towards the running totals (prep_df adds zeroed status/temp columns)
+        self._recorded = np.zeros(n, dtype=bool)
+
+    def flush_data(self):
+        """Writes the buffered status and temperature records into self.data. Called automatically when self.data is accessed.
+        """
+        self._data['status']=self._status_buffer.astype(int)
+        #temps are stored as float32, rounding restores the 4 decimals the temperature is kept to
+        self._data['recorded_temp']=np.round(self._temp_buffer.astype(np.float64), 4)
+        self._unflushed = False
+
+    def _reset_totals(self):
+        """helper function to zero the running totals
+        """
+        self._recorded = None
+        self._steps = 0
+        self._on_steps = 0
+        self._on_moer = 0.0
+        self._temp_sum = 0.0
+        self._min_temp = np.inf
+        self._max_temp = -np.inf
+
+    def _add_to_totals(self, positions, status, temps):
+        """helper function to add newly recorded steps to the running totals
+        """
+        if len(status) == 0:
+            return
+        self._steps += len(status)
+        self._on_steps += int(status.sum())
+        self._on_moer += float(np.dot(status, self._moer[positions]))
+        self._temp_sum += float(temps.sum())
+        self._min_temp = min(self._min_temp, float(temps.min()))
+        self._max_temp = max(self._max_temp, float(temps.max()))
+
+    def _recount_totals(self):
+        """helper function to rebuild the running totals from every recorded step in the buffers
+        """
+        recorded = self._recorded
+        self._reset_totals()
+        self._recorded = recorded
+        positions = np.flatnonzero(recorded)
+        self._add_to_totals(positions, self._status_buffer[positions].astype(np.float64),
+                            np.round(self._temp_buffer[positions].astype(np.float64), 4))
+
+    def running_totals(self):
+        """Emissions, energy, run time and temperature statistics of the steps recorded so far. The totals are
+            updated by record_data, so they can be checked in O(1) at any point of a run (ex: to report progress
+            or stop a simulation that is already worse than the baseline).
+
+        Returns:
+            (dict): recorded steps, CO2 (lbs), energy (MWH), run time minutes and average/min/max temperature
+        """
+        mega_watts = self.watts/1000000
+        running_min = self._on_steps*self.time_step_minutes
+        return {
+            'steps': self._steps,
+            'co2_lbs': self._on_moer*mega_watts*(self.time_step_minutes/60),
+            'mwh': mega_watts*(running_min/60),
+            'run_time_min': running_min,
+            'average_temp': self._temp_sum/self._steps if self._steps else np.nan,
+            'min_temp': self._min_temp if self._steps else np.nan,
+            'max_temp': self._max_temp if self._steps else np.nan,
+        }
 
     def _calc_carbon_footprint(self):
         #status to minutes running
@@ -108,32 +240,86 @@ class Refrigerator():
             'marginal_carbon_footprint_hr':'sum',
         }
 
-        #create copy and set time index
-        self.data_to_plot = self.data.copy()
-        self.data_to_plot.set_index('timestamp', inplace=True)
+        #only the aggregated columns are copied, with the time index
+        self.data_to_plot = self.data[['timestamp']+list(agg_map)].set_index('timestamp')
 
         #resample to hourly data for chart clarity
         self.data_to_plot = self.data_to_plot.resample('H').agg(agg_map)
+        self.data_to_plot['marginal_carbon_cumu_sum'] = self.data_to_plot.marginal_carbon_footprint_hr.cumsum()
         self.data_to_plot.reset_index(inplace=True)
 
-    def report(self, file_path='reports/Refrigerator_Simulation.jpg'):
+    def summary(self):
+        """Simulation metrics from the running totals (see running_totals), without flushing, copying or resampling the data.
+            When nothing was recorded through record_data, they are computed from the status/recorded_temp columns.
+
+        Returns:
+            (dict): total CO2 (lbs), total run time minutes, average running minutes per hour and average temperature
+        """
+        totals = self.running_totals()
+        if totals['steps'] == 0 and 'status' in self._data:
+            #nothing recorded through record_data (ex: a frame of earlier results was assigned), use its columns
+            status = self._data.status.values
+            totals['co2_lbs'] = np.dot(status, self._data.MOER.values)*(self.watts/1000000)*(self.time_step_minutes/60)
+            totals['run_time_min'] = status.sum()*self.time_step_minutes
+            totals['average_temp'] = self._data.recorded_temp.values.mean()
+        #hourly periods spanned by the data, like the hourly resampling in _report_prep
+        time_stamps = self._data.timestamp
+        n_hours = (time_stamps.iloc[-1].floor('H')-time_stamps.iloc[0].floor('H'))//pd.Timedelta(1,'h') + 1
+        return {
+            'total_co2_lbs': totals['co2_lbs'],
+            'run_time_min': self.running_time,
+            'running_min_per_hour': totals['run_time_min']/n_hours,
+            'average_temp': totals['average_temp'],
+        }
+
+    def print_summary(self):
+        """Prints the simulation metrics (see summary) without plotting.
+        """
+        summary = self.summary()
+        print(f'Total amount of CO2 produced (lbs): {summary["total_co2_lbs"]}')
+        print(f'Total run time minutes: {summary["run_time_min"]}')
+        print(f'Average time running per hour: {summary["running_min_per_hour"]}')
+        print(f'Average internal temperature: {summary["average_temp"]}')
+
+    def report(self, file_path='reports/Refrigerator_Simulation.jpg', summary_only=False, figsize=(40,16), dpi=100):
         """Creates report of simulation with figures and print outs. Saves to /reports/Refrigerator_Simulation.jpg
+            The figure is rendered off screen (Agg) and series with more points than the figure is pixels wide
+            are downsampled, keeping the min and max of each pixel column.
+
+        Args:
+            file_path (str, optional): where to save the figure.
+            summary_only (bool, optional): only print the metrics, without plotting. Defaults to False.
+            figsize (tuple, optional): figure size in inches. Defaults to (40,16).
+            dpi (int, optional): figure resolution. Defaults to 100.
         """
+        if summary_only:
+            self.print_summary()
+            return
+
         self._calc_carbon_footprint()
         self._report_prep()
-        
-        #matplotlib graphing
-        fig, ax = plt.subplots(nrows=2, ncols=1,figsize=(40,16))
+        max_points = int(figsize[0]*dpi)
+        time_stamps = self.data_to_plot.timestamp
+
+        #matplotlib graphing, on a figure not managed by pyplot so no gui backend is involved
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.subplots(nrows=2, ncols=1)
         ax2 = ax[0].twinx()
         ax1_2 = ax[1].twinx()
 
-        ax[0].plot("timestamp", "recorded_temp", data=self.data_to_plot, color='teal', label='Temperature')
-        ax2.plot("timestamp", "MOER", data=self.data_to_plot, color='purple', label='MOER')
-        ax[1].bar(self.data_to_plot.timestamp, self.data_to_plot.total_time_running_min, .03, color='teal', label='Minutes')
-        ax1_2.plot("timestamp", "marginal_carbon_cumu_sum",data=self.data, color='purple', label='CO2')
+        ax[0].plot(*min_max_decimate(time_stamps, self.data_to_plot.recorded_temp, max_points), color='teal', label='Temperature')
+        ax2.plot(*min_max_decimate(time_stamps, self.data_to_plot.MOER, max_points), color='purple', label='MOER')
+        if len(time_stamps) <= max_points:
+            ax[1].bar(time_stamps, self.data_to_plot.total_time_running_min, .03, color='teal', label='Minutes')
+        else:
+            #too many hours for individual bars to be visible
+            ax[1].plot(*min_max_decimate(time_stamps, self.data_to_plot.total_time_running_min, max_points), color='teal', label='Minutes')
+        ax1_2.plot(*min_max_decimate(time_stamps, self.data_to_plot.marginal_carbon_cumu_sum, max_points), color='purple', label='CO2')
 
-        ax[0].set_xlim(xmin='2019-03-01', xmax='2019-04-01')
-        ax[1].set_xlim(xmin='2019-03-01', xmax='2019-04-01')
+        #limit the time axis to the simulated date range
+        ax[0].set_xlim(xmin=time_stamps.iloc[0], xmax=time_stamps.iloc[-1])
+        ax[1].set_xlim(xmin=time_stamps.iloc[0], xmax=time_stamps.iloc[-1])
         ax[1].set_ylim(ymax=60)
         ax1_2.set_ylim(ymin=0)
 
@@ -148,17 +334,38 @@ class Refrigerator():
         ax[1].legend()
 
         ax[0].set_title('Refrigerator Simulation')
-        plt.savefig(file_path)
+        fig.savefig(file_path)
 
-        print(f'Total amount of CO2 produced (lbs): {self.data.marginal_carbon_footprint_hr.sum()}')
-        print(f'Total run time minutes: {self.running_time}')
-        print(f'Average time running per hour: {self.data_to_plot.total_time_running_min.mean()}')
-        print(f'Average internal temperature: {self.data.recorded_temp.mean()}')
+        self.print_summary()
 
-    
+def min_max_decimate(x, y, max_points):
+    """Downsamples a series to about max_points points, keeping the min and max of each of max_points/2 buckets
+        (in their original order) so peaks and troughs stay visible.
 
+    Args:
+        x (array): x values, ex: timestamps.
+        y (array): y values.
+        max_points (int): maximum number of points to return.
 
-        
-        
-        
+    Returns:
+        x, y: (np.array) downsampled series, or the original values if there are no more than max_points.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n_buckets = max(max_points//2, 1)
+    if len(y) <= max_points:
+        return x, y
+
+    #equal sized buckets (the remainder goes in the last one), pick the min and max positions in each, ignoring gaps
+    bucket_size = len(y)//n_buckets
+    lows_y, highs_y = np.where(np.isnan(y), np.inf, y), np.where(np.isnan(y), -np.inf, y)
+    offsets = np.arange(n_buckets)*bucket_size
+    lows = offsets + lows_y[:bucket_size*n_buckets].reshape(n_buckets, bucket_size).argmin(axis=1)
+    highs = offsets + highs_y[:bucket_size*n_buckets].reshape(n_buckets, bucket_size).argmax(axis=1)
+    tail = np.arange(bucket_size*n_buckets, len(y))
+    if len(tail):
+        lows = np.append(lows, tail[lows_y[tail].argmin()])
+        highs = np.append(highs, tail[highs_y[tail].argmax()])
 
+    idx = np.unique(np.concatenate([lows, highs]))
+    #keep pandas x values (ex: tz-aware timestamps) as they are
+    return (x.iloc[idx] if hasattr(x, 'iloc') else np.asarray(x)[idx]), y[idx]
@@ -0,0 +1,152 @@
+import numpy as np
+from scipy.signal import lfilter
+from src.state_table import get_state_table, to_ticks, trajectory_ticks
+
+class RobustOptimizer():
+    """Forecast-uncertainty (Monte-Carlo) alternative to optimize() for the moer_min objective. Each forecast
+        window is perturbed into n_scenarios noisy MOER forecasts, and each scenario also draws the refrigerator's
+        heat rate (ex: door openings, room temperature). Every possible state (see StateTable) is scored against
+        all scenarios at once: the expected MOER and the probability of leaving the temperature range. The state
+        with the lowest expected MOER among those with a violation probability <= max_violation is picked.
+
+        Emissions are linear in MOER, so the expected MOER of every state is one product with the mean scenario.
+        For a state with k_t on steps out of t, the temperature is linear in the heat rate h, fridge_temp + h*(t-k_t)
+        - cool_rate*k_t, so each state keeps the temperature in range for an interval of heat rates and its violation
+        probability is the share of scenario heat rates outside it (a binary search in the sorted scenarios).
+        Like the nominal path, temperatures and heat rates are compared exactly as integer ticks (see to_ticks).
+        Thousands of scenarios per hour cost about as much as the exact lookup.
+
+    Attributes:
+        n_scenarios (int): number of forecast scenarios per window.
+        moer_noise (float): relative standard deviation of the MOER forecast error.
+        noise_correlation (float): AR(1) correlation of the forecast error between consecutive steps.
+        heat_noise (float): relative standard deviation of the heat rate across scenarios.
+        max_violation (float): highest accepted probability of leaving [min_temp, max_temp].
+        random_state (int): seed, scenarios are drawn from [random_state, window] so windows are reproducible.
+    """
+    def __init__(self, n_scenarios=1000, moer_noise=0.1, noise_correlation=0.9, heat_noise=0.05, max_violation=0.05,
+                    random_state=1, min_temp=33, max_temp=43):
+        self.n_scenarios = n_scenarios
+        self.moer_noise = moer_noise
+        self.noise_correlation = noise_correlation
+        self.heat_noise = heat_noise
+        self.max_violation = max_violation
+        self.random_state = random_state
+        self.min_temp = min_temp
+        self.max_temp = max_temp
+        self._on_counts = {}
+
+    def scenarios(self, moer_vector, heat_rate, window=0):
+        """Noisy MOER forecasts and heat rates for a forecast window.
+
+        Args:
+            moer_vector (array): MOER forecast for each time step.
+            heat_rate (float): nominal temp increase per time step while off.
+            window (int, optional): window number, seeds the draws. Defaults to 0.
+
+        Returns:
+            moer_scenarios: (np.array) (n_scenarios, len(moer_vector)) MOER forecasts, >= 0.
+            heat_scenarios: (np.array) (n_scenarios,) sorted heat rates, >= 0.
+        """
+        moer_vector = np.asarray(moer_vector, dtype=np.float64)
+        rng = np.random.default_rng(None if self.random_state is None else [self.random_state, window])
+        #AR(1) relative errors with a stationary standard deviation of moer_noise, like synthetic_moer_df's noise
+        rho = self.noise_correlation
+        shocks = rng.normal(0, self.moer_noise*np.sqrt(1-rho**2), (self.n_scenarios, len(moer_vector)))
+        shocks[:, 0] *= 1/np.sqrt(1-rho**2) if rho < 1 else 1
+        errors = lfilter([1], [1, -rho], shocks, axis=1)
+        moer_scenarios = np.clip(moer_vector*(1+errors), 0, None)
+        heat_scenarios = np.sort(np.clip(heat_rate*(1+rng.normal(0, self.heat_noise, self.n_scenarios)), 0, None))
+        return moer_scenarios, heat_scenarios
+
+    def _counts(self, table):
+        """helper function for the on-step and off-step counts after each step of every state in table
+        """
+        counts = self._on_counts.get(table.state_length)
+        if counts is None:
+            on_counts = np.cumsum(table.states, axis=1, dtype=np.int64)
+            counts = (on_counts, np.arange(1, table.state_length+1) - on_counts)
+            self._on_counts[table.state_length] = counts
+        return counts
+
+    def heat_rate_bounds(self, table, fridge_temp, cool_rate):
+        """Range of heat rates [low, high] (ticks) for which each state keeps the temperature in range (low > high when none).
+        """
+        on_counts, off_counts = self._counts(table)
+        #temp after t steps: fridge_temp + h*off - cool_rate*on, solved for h at both bounds in integer ticks
+        cooled = to_ticks(fridge_temp) + trajectory_ticks(table.states, 0, to_ticks(cool_rate))
+        min_ticks, max_ticks = to_ticks(self.min_temp), to_ticks(self.max_temp)
+        never, always = np.iinfo(np.int64).max, np.iinfo(np.int64).min
+        divisor = np.maximum(off_counts, 1)
+        high = np.where(off_counts > 0, (max_ticks - cooled)//divisor, never)
+        low = np.where(off_counts > 0, -((cooled - min_ticks)//divisor), always)
+        #steps without any off step don't depend on h
+        stuck = ((off_counts == 0) & ((cooled < min_ticks) | (cooled > max_ticks))).any(axis=1)
+        low, high = low.max(axis=1), high.min(axis=1)
+        low[stuck] = never
+        return low, high
+
+    def evaluate(self, moer_scenarios, heat_scenarios, fridge_temp, cool_rate):
+        """Expected MOER and violation probability of every state of the window against all scenarios.
+
+        Returns:
+            table: (StateTable) the states, in the order of the other arrays.
+            expected: (np.array) expected total MOER of each state.
+            violation_prob: (np.array) share of scenarios in which each state leaves the temperature range.
+        """
+        n_steps = moer_scenarios.shape[1]
+        #the table's heat rate is unused, states and emissions don't depend on it
+        table = get_state_table(n_steps, 0, cool_rate)
+        expected = table.emissions(moer_scenarios.mean(axis=0))
+        low, high = self.heat_rate_bounds(table, fridge_temp, cool_rate)
+        heat_ticks = to_ticks(heat_scenarios)
+        in_range = np.searchsorted(heat_ticks, high, side='right') - np.searchsorted(heat_ticks, low, side='left')
+        violation_prob = 1 - np.maximum(in_range, 0)/len(heat_ticks)
+        return table, expected, violation_prob
+
+    def solve(self, moer_vector, fridge_temp, heat_rate, cool_rate, window=0):
+        """Picks the state with the lowest expected MOER whose violation probability is <= max_violation
+            (or the lowest violation probability when none is), and summarizes its emissions across scenarios.
+
+        Args:
+            moer_vector (array): MOER forecast for each time step.
+            fridge_temp (int/float): fridge temp at the start of the window.
+            heat_rate (float): nominal temp increase per time step while off.
+            cool_rate (float): temp decrease per time step while on.
+            window (int, optional): window number, seeds the scenarios. Defaults to 0.
+
+        Returns:
+            best_state: (np.array) chosen state.
+            stats: (dict) 'expected', 'std', 'p5', 'p50', 'p95' of its total MOER across scenarios, its
+                    'violation_prob' and 'scenario_moer' (its total MOER in each scenario).
+        """
+        moer_scenarios, heat_scenarios = self.scenarios(moer_vector, heat_rate, window)
+        table, expected, violation_prob = self.evaluate(moer_scenarios, heat_scenarios, fridge_temp, cool_rate)
+
+        accepted = violation_prob <= self.max_violation
+        if accepted.any():
+            best_idx = np.argmin(np.where(accepted, expected, np.inf))
+        else:
+            #least likely to leave the range, cheapest among ties
+            best_idx = np.lexsort((expected, violation_prob))[0]
+        best_state = table.states[best_idx].astype(int)
+
+        scenario_moer = moer_scenarios @ best_state
+        p5, p50, p95 = np.percentile(scenario_moer, [5, 50, 95])
+        stats = {'expected': expected[best_idx], 'std': scenario_moer.std(), 'p5': p5, 'p50': p50, 'p95': p95,
+                    'violation_prob': violation_prob[best_idx], 'scenario_moer': scenario_moer}
+        return best_state, stats
+
+def robust_summary(window_stats, watts=200, minutes=5):
+    """Distribution of the total CO2 (lbs) over a run from the per window stats of RobustOptimizer.solve. Scenario i
+        of the total sums scenario i of every window (windows are drawn independently).
+
+    Returns:
+        (dict): expected, std, 5th/50th/95th percentile of total CO2 (lbs) and the mean and max violation probability
+    """
+    lbs_per_moer = (watts/1000000)*(minutes/60)
+    total = np.sum([stats['scenario_moer'] for stats in window_stats], axis=0)*lbs_per_moer
+    violation_prob = np.array([stats['violation_prob'] for stats in window_stats])
+    p5, p50, p95 = np.percentile(total, [5, 50, 95])
+    return {'expected_co2_lbs': total.mean(), 'std_co2_lbs': total.std(), 'p5_co2_lbs': p5, 'p50_co2_lbs': p50,
+            'p95_co2_lbs': p95, 'mean_violation_prob': violation_prob.mean(), 'max_violation_prob': violation_prob.max()}
@@ -0,0 +1,155 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+#config keys that don't change the simulated states/temperatures, left out of the cache key
+IGNORED_KEYS = ('end_dt', 'max_co2_lbs', 'fitness_cache', 'cache_dir')
+
+def _canonical(value):
+    """helper function to turn config values (including functions and mlrose schedule objects) into JSON-able values
+    """
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if callable(value) and hasattr(value, '__name__'):
+        return f'{value.__module__}.{value.__name__}'
+    #objects such as mlrose.ExpDecay() are identified by their class and parameters
+    return {'class': type(value).__name__, **{k: _canonical(v) for k, v in sorted(vars(value).items())}}
+
+def _algorithm_name(config):
+    algorithm = config.get('algorithm', 'simulated_annealing')
+    return getattr(algorithm, '__name__', algorithm)
+
+def config_key(config):
+    """Hash of every config value that affects the simulated states, ex: mode, algorithm settings, lapse rates,
+        starting temp and start date (the end date is left out so longer runs can reuse shorter ones).
+    """
+    key_config = {k: v for k, v in config.items() if k not in IGNORED_KEYS}
+    return hashlib.sha256(json.dumps(_canonical(key_config), sort_keys=True).encode()).hexdigest()
+
+def data_key(time_stamps, moer, chunk_length=12):
+    """Hash of the first time stamp and the first chunk (hour) of MOER data. Runs over longer or shorter slices of
+        the same data share it, so they share an entry, while other regions or dates get their own.
+
+    Args:
+        time_stamps (np.array): UTC time stamps (int64 ns) of the simulated data.
+        moer (np.array): MOER value of each time stamp.
+    """
+    head = np.concatenate([time_stamps[:1].astype(np.float64), moer[:chunk_length].astype(np.float64)])
+    return hashlib.sha256(head.tobytes()).hexdigest()
+
+def _data_columns(data):
+    """helper function for the time stamps (UTC int64 ns) and MOER columns entries are matched on
+    """
+    return data.timestamp.values.astype('datetime64[ns]').astype('int64'), data.MOER.values.astype(np.float64)
+
+class RunCache():
+    """Content-addressed cache of simulation results. Each configuration (see config_key) and data slice (see
+        data_key) has an entry holding the simulated time stamps and MOER data next to the per-step status and
+        temperature, saved as columns of a .npz file. A run whose data matches the start of an entry reuses those steps and only simulates the
+        rest, so re-running the same dates costs nothing and extending the end date costs only the new hours.
+
+    Attributes:
+        cache_dir (str): directory of the cache, created if needed.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, config, data):
+        return os.path.join(self.cache_dir, f'{config_key(config)}-{data_key(*_data_columns(data))}.npz')
+
+    def cacheable(self, config):
+        """Whether runs with config are reproducible: stochastic optimizers need a fixed random_state.
+            'robust' runs aren't cached, their scenario statistics aren't per-step results.
+        """
+        mode = config.get('mode', 'optimized')
+        if mode == 'robust':
+            return False
+        if mode in ('baseline', 'global') or _algorithm_name(config) in ('exact', 'exact_search'):
+            return True
+        return config.get('random_state') is not None
+
+    def reusable_steps(self, config, n_matching, n_stored, n_data):
+        """Number of cached steps a run can reuse, given that the first n_matching steps of its data match an entry
+            of n_stored steps and the run covers n_data steps.
+        """
+        if n_matching == n_stored == n_data:
+            return n_data
+        mode = config.get('mode', 'optimized')
+        forecast_length = config.get('forecast_length', 12)
+        if mode == 'baseline':
+            #baseline states always cover one hour (12 steps)
+            return n_matching//12*12
+        if mode == 'optimized':
+            return n_matching//forecast_length*forecast_length
+        if mode == 'receding_horizon' and _algorithm_name(config) in ('exact', 'exact_search'):
+            #the last steps of the entry saw truncated forecasts, the annealing warm start can't be resumed
+            return max(min(n_matching, n_stored-forecast_length+1), 0)
+        #whole period schedules depend on every step
+        return 0
+
+    def _matching_steps(self, entry, time_stamps, moer):
+        """helper function for the number of leading steps whose time stamp and MOER match entry
+        """
+        n = min(len(entry['status']), len(moer))
+        mismatches = np.flatnonzero((entry['timestamp'][:n] != time_stamps[:n]) | (entry['MOER'][:n] != moer[:n]))
+        return mismatches[0] if len(mismatches) else n
+
+    def load(self, config, data):
+        """Cached columns for config and data ('timestamp' (UTC ns), 'MOER', 'status', 'recorded_temp'), or None.
+        """
+        path = self._path(config, data)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as entry:
+            return {name: entry[name] for name in entry.files}
+
+    def restore(self, config, fridge):
+        """Records the reusable cached steps into fridge (whose data is the simulated df) and advances its temperature
+            and running time to the end of them, so the simulation can continue from there.
+
+        Returns:
+            (int): number of steps restored, the simulation continues from this row.
+        """
+        entry = self.load(config, fridge.data) if self.cacheable(config) else None
+        if entry is None:
+            return 0
+        time_stamps, moer = _data_columns(fridge.data)
+        n_matching = self._matching_steps(entry, time_stamps, moer)
+
+        n_restored = self.reusable_steps(config, n_matching, len(entry['status']), len(moer))
+        if n_restored == 0:
+            return 0
+        status, temps = entry['status'][:n_restored], entry['recorded_temp'][:n_restored]
+        fridge.record_data(fridge.data.index[:n_restored], status, temps)
+        fridge.current_temp = float(temps[-1])
+        fridge.running_time += int(status.sum())*fridge.time_step_minutes
+        return n_restored
+
+    def save(self, config, fridge, n_steps=None):
+        """Saves the first n_steps recorded steps of fridge (default all) as the entry for config and its data, unless
+            an entry at least as long over the same data is already cached. Entries over other data are replaced.
+        """
+        if not self.cacheable(config):
+            return
+        data = fridge.data
+        n_steps = len(data) if n_steps is None else n_steps
+        entry = self.load(config, data)
+        if entry is not None and len(entry['status']) >= n_steps and self._matching_steps(entry, *_data_columns(data)) >= n_steps:
+            return
+        path = self._path(config, data)
+        #write then rename, so parallel sweep workers never read a partial entry
+        tmp_path = f'{path[:-4]}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path,
+                 timestamp=data.timestamp.values[:n_steps].astype('datetime64[ns]').astype('int64'),
+                 MOER=data.MOER.values[:n_steps].astype(np.float64),
+                 status=data.status.values[:n_steps].astype(np.int8),
+                 recorded_temp=data.recorded_temp.values[:n_steps].astype(np.float64))
+        os.replace(tmp_path, path)
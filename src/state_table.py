@@ -0,0 +1,160 @@
+import numpy as np
+from functools import lru_cache
+
+#fitness reported for state vectors that leave the allowed temperature range (matches moer_min)
+INFEASIBLE_FITNESS = 99999999999
+#slack allowed on the temperature bounds to absorb float rounding of the lapse rates
+TEMP_TOLERANCE = 1e-6
+#temperatures are kept to 4 decimals, as integer ticks of 1/TEMP_SCALE deg
+TEMP_SCALE = 10000
+
+def to_ticks(temp):
+    """Converts temperatures or lapse rates (deg, scalar or array) to integer fixed-point ticks.
+    """
+    if isinstance(temp, (int, float, np.number)):
+        return int(round(float(temp)*TEMP_SCALE))
+    return np.rint(np.asarray(temp, dtype=np.float64)*TEMP_SCALE).astype(np.int64)
+
+def trajectory_ticks(states, heat_ticks, cool_ticks):
+    """Cumulative temperature change (ticks) at each step of one or many state vectors, in closed form: 
+        after t steps with k of them on the change is heat_ticks*(t-k) - cool_ticks*k, so it is exact.
+
+    Args:
+        states (np.array): (n_states, state_length) array of binary on/off states (or a single 1-D state).
+        heat_ticks (int): temp increase per time step while off, in ticks (see to_ticks).
+        cool_ticks (int): temp decrease per time step while on, in ticks.
+
+    Returns:
+        (np.array): int64 offsets with the same shape as states, add the starting temp ticks to get the trajectory.
+    """
+    on_counts = np.cumsum(np.asarray(states)==1, axis=-1, dtype=np.int64)
+    heat_steps = np.arange(heat_ticks, heat_ticks*(on_counts.shape[-1]+1), heat_ticks, dtype=np.int64) if heat_ticks else 0
+    return heat_steps - (heat_ticks+cool_ticks)*on_counts
+
+def in_range(temp_ticks, min_temp=33, max_temp=43):
+    """Whether every temperature (ticks) along the last axis is within [min_temp, max_temp].
+    """
+    return ((temp_ticks >= to_ticks(min_temp)) & (temp_ticks <= to_ticks(max_temp))).all(axis=-1)
+
+class StateTable():
+    """Every possible on/off state vector for a forecast window, precomputed with its temperature trajectory.
+
+    Attributes:
+        state_length (int): length of each state vector (number of periods in the forecast).
+        heat_rate (float): temp increase per period while the refrigerator is off.
+        cool_rate (float): temp decrease per period while the refrigerator is on.
+        states (np.array): (2**state_length, state_length) int8 array, row i holds the binary digits of i.
+        offsets (np.array): (2**state_length, state_length) cumulative temp change at each step of each state.
+        lower_temp (np.array): lowest starting temp for which each state stays within [min_temp, max_temp].
+        upper_temp (np.array): highest starting temp for which each state stays within [min_temp, max_temp].
+        lower_ticks (np.array): lower_temp in exact integer ticks (see to_ticks), without the float tolerance.
+        upper_ticks (np.array): upper_temp in exact integer ticks.
+    """
+    def __init__(self, state_length, heat_rate, cool_rate, min_temp=33, max_temp=43):
+        self.state_length = state_length
+        self.heat_rate = heat_rate
+        self.cool_rate = cool_rate
+        self.min_temp = min_temp
+        self.max_temp = max_temp
+
+        #enumerate all 2**n state vectors, most significant bit first
+        codes = np.arange(2**state_length, dtype=np.int64)
+        shifts = np.arange(state_length-1, -1, -1, dtype=np.int64)
+        self.states = ((codes[:, None] >> shifts) & 1).astype(np.int8)
+        self._weights = self.states.astype(np.float64)
+
+        offset_ticks = trajectory_ticks(self.states, to_ticks(heat_rate), to_ticks(cool_rate))
+        self.offsets = offset_ticks/TEMP_SCALE
+
+        #a state is feasible from starting temp T when min_temp <= T+offset <= max_temp at every step,
+        #checked exactly in ticks (lower_temp/upper_temp keep a tolerance for float comparisons)
+        self.lower_ticks = to_ticks(min_temp) - offset_ticks.min(axis=1)
+        self.upper_ticks = to_ticks(max_temp) - offset_ticks.max(axis=1)
+        self.lower_temp = self.lower_ticks/TEMP_SCALE - TEMP_TOLERANCE
+        self.upper_temp = self.upper_ticks/TEMP_SCALE + TEMP_TOLERANCE
+
+    def feasible(self, fridge_temp):
+        """Boolean mask of the states that keep the refrigerator in range starting from fridge_temp.
+        """
+        temp_ticks = to_ticks(fridge_temp)
+        return (self.lower_ticks <= temp_ticks) & (temp_ticks <= self.upper_ticks)
+
+    def violation(self, fridge_temp):
+        """Largest excursion (deg) outside of the allowed temperature range for each state, 0 when feasible.
+        """
+        temp_ticks = to_ticks(fridge_temp)
+        return np.maximum(np.maximum(self.lower_ticks-temp_ticks, temp_ticks-self.upper_ticks), 0)/TEMP_SCALE
+
+    def emissions(self, moer_vector):
+        """Total MOER of every state for the given forecast, as a single matrix-vector product.
+        """
+        return self._weights @ np.asarray(moer_vector, dtype=np.float64)
+
+    def solve(self, moer_vector, fridge_temp):
+        """Finds the feasible state with the minimum total MOER. If no state is feasible, the state
+            with the smallest temperature violation is returned with INFEASIBLE_FITNESS.
+
+        Args:
+            moer_vector (array): MOER data for each time step in the forecast.
+            fridge_temp (int/float): fridge temp at the start of the forecast.
+
+        Returns:
+            best_state: (array) state vector with the minimum MOER.
+            best_fitness: (float) total MOER at best state.
+        """
+        return self.best(self.emissions(moer_vector), fridge_temp)
+
+    def window_emissions(self, moer_series):
+        """Total MOER of every state for every full forecast window sliding along moer_series,
+            as a single matrix product. Row j holds the emissions for the window starting at moer_series[j].
+
+        Args:
+            moer_series (array): MOER data for consecutive time steps, at least state_length long.
+
+        Returns:
+            (np.array): (len(moer_series)-state_length+1, 2**state_length) array of emissions.
+        """
+        moer_series = np.ascontiguousarray(moer_series, dtype=np.float64)
+        n_windows = len(moer_series) - self.state_length + 1
+        stride = moer_series.strides[0]
+        #zero-copy (n_windows, state_length) view of the overlapping windows
+        windows = np.lib.stride_tricks.as_strided(moer_series, shape=(n_windows, self.state_length), 
+                                                    strides=(stride, stride), writeable=False)
+        return windows @ self._weights.T
+
+    def best(self, emissions, fridge_temp):
+        """Picks the feasible state with the minimum of precomputed emissions (see solve).
+        """
+        mask = self.feasible(fridge_temp)
+        if mask.any():
+            best_idx = np.argmin(np.where(mask, emissions, np.inf))
+            return self.states[best_idx].astype(int), emissions[best_idx]
+
+        best_idx = np.argmin(self.violation(fridge_temp))
+        return self.states[best_idx].astype(int), INFEASIBLE_FITNESS
+
+@lru_cache(maxsize=32)
+def get_state_table(state_length, heat_rate, cool_rate, min_temp=33, max_temp=43):
+    """Returns the StateTable for the given window and lapse rates, building it only the first time it's requested.
+    """
+    return StateTable(state_length, heat_rate, cool_rate, min_temp=min_temp, max_temp=max_temp)
+
+def exact_search(state_length, moer_vector, fridge_temp, heat_rate, cool_rate):
+    """Exhaustive, guaranteed optimal alternative to the mlrose algorithms for the moer_min objective.
+        Can be passed as the algorithm to optimize().
+
+    Args:
+        state_length (int): length of state_vector to be optimized.
+        moer_vector (array): array of moer data for each time step with same length of state.
+        fridge_temp (int/float): initial fridge temp at start of hour.
+        heat_rate (float): temp increase per time step while off.
+        cool_rate (float): temp decrease per time step while on.
+
+    Returns:
+        best_state: (array) Numpy array containing state that minimizes MOER.
+        best_fitness: (float) Value of fitness (MOER) at best state.
+        curve: (array) Numpy array containing the best fitness (a single lookup, so one entry).
+    """
+    table = get_state_table(state_length, heat_rate, cool_rate)
+    best_state, best_fitness = table.solve(moer_vector, fridge_temp)
+    return best_state, best_fitness, np.array([best_fitness])
@@ -0,0 +1,182 @@
+import itertools
+import time
+import multiprocessing
+import numpy as np
+import pandas as pd
+from src.refrigerator import Refrigerator
+from src.utils import prep_df
+from src.optimization import *
+from src.receding_horizon import RecedingHorizonController
+from src.dynamic_programming import global_optimize
+from src.run_cache import RunCache
+from src.robust import RobustOptimizer, robust_summary
+
+#algorithm and schedule names usable in a sweep grid (names rather than objects so configs pickle cleanly)
+ALGORITHMS = {
+    'simulated_annealing': mlrose.simulated_annealing,
+    'random_hill_climb': mlrose.random_hill_climb,
+    'hill_climb': mlrose.hill_climb,
+    'genetic_alg': mlrose.genetic_alg,
+    'mimic': mlrose.mimic,
+    'exact': exact_search,
+}
+SCHEDULES = {
+    'ExpDecay': mlrose.ExpDecay,
+    'GeomDecay': mlrose.GeomDecay,
+    'ArithDecay': mlrose.ArithDecay,
+}
+
+#defaults match refrigerator_sim.py, any key can be overridden by the grid
+DEFAULT_CONFIG = {
+    'mode': 'optimized', #'baseline', 'optimized' (hourly), 'robust' (hourly, Monte-Carlo forecast scenarios), 'receding_horizon' (every step) or 'global' (whole period lower bound)
+    'algorithm': 'simulated_annealing',
+    'schedule': 'ExpDecay',
+    'max_attempts': 10,
+    'max_iters': 10,
+    'random_state': 1,
+    'fitness_cache': False, #cache state feasibility across hours (see FitnessCache)
+    'n_scenarios': 1000, #'robust' mode: forecast scenarios per hour, MOER forecast error and heat rate spread (relative std)
+    'moer_noise': 0.1,
+    'heat_noise': 0.05,
+    'max_violation': 0.05, #'robust' mode: highest accepted probability of leaving the temperature range
+    'max_co2_lbs': None, #stop hourly ('baseline'/'optimized') runs once their CO2 exceeds this, ex: the baseline total
+    'cache_dir': None, #directory of a RunCache to reuse the results of earlier runs with the same config and data
+    'heat_rate': 5,
+    'cool_rate': 10,
+    'forecast_length': 12,
+    'starting_temp': 33,
+    'start_dt': '2019-03-01 00:00:00+00:00',
+    'end_dt': '2019-03-31 23:00:00+00:00',
+}
+
+#MOER data shared (read only) by the worker processes, set once per worker by _init_worker
+_moer_df = None
+
+def parameter_grid(**params):
+    """Every combination of the given parameter values, each merged into DEFAULT_CONFIG.
+
+    Args:
+        **params: lists of values per config key. Ex: parameter_grid(max_iters=[10,100], heat_rate=[4,5])
+
+    Returns:
+        (list): list of config dicts
+    """
+    keys = list(params)
+    return [dict(DEFAULT_CONFIG, **dict(zip(keys, values))) for values in itertools.product(*params.values())]
+
+def algorithm_kwargs(config):
+    """mlrose kwargs for the algorithm named in config.
+    """
+    kwargs = {'max_attempts':config['max_attempts'], 'max_iters':config['max_iters'],
+                'random_state':config['random_state'], 'curve':True}
+    if config['algorithm'] == 'hill_climb':
+        #hill climbing stops at a local optimum, it has no max_attempts
+        del kwargs['max_attempts']
+    if config['algorithm'] == 'simulated_annealing':
+        kwargs['schedule'] = SCHEDULES[config['schedule']]()
+    return kwargs
+
+def run_scenario(config, moer_df=None):
+    """Runs one simulation and summarizes it.
+
+    Args:
+        config (dict): simulation parameters, see DEFAULT_CONFIG.
+        moer_df (pd.DataFrame, optional): MOER data with 'timestamp' and 'MOER'. Defaults to the worker's shared data.
+
+    Returns:
+        (dict): config plus total CO2 (lbs), run time minutes, average temp, simulation wall time (s) and
+                whether the run stopped early (max_co2_lbs exceeded, the totals then cover the simulated part only).
+                'robust' runs add the distribution of the total CO2 across forecast scenarios (see robust_summary).
+    """
+    config = dict(DEFAULT_CONFIG, **config)
+    moer_df = _moer_df if moer_df is None else moer_df
+    df = prep_df(moer_df.copy(), start_dt=config['start_dt'], end_dt=config['end_dt'])
+    moer_vector = df.MOER.values
+    forecast_length = config['forecast_length']
+    algorithm = ALGORITHMS[config['algorithm']]
+    kwargs = algorithm_kwargs(config)
+    fitness_fn = FitnessCache() if config['fitness_cache'] else moer_min
+    robust = RobustOptimizer(n_scenarios=config['n_scenarios'], moer_noise=config['moer_noise'], heat_noise=config['heat_noise'],
+                                max_violation=config['max_violation'], random_state=config['random_state'])
+    window_stats = []
+
+    fridge = Refrigerator(starting_temp=config['starting_temp'], data=df)
+    fridge.set_lapse_rates(heat_rate=config['heat_rate'], cool_rate=config['cool_rate'])
+
+    start = time.perf_counter()
+    cache = RunCache(config['cache_dir']) if config['cache_dir'] else None
+    n_restored = cache.restore(config, fridge) if cache else 0
+    stopped_early = _over_limit(fridge, config)
+    #rows simulated (or restored) so far, always a prefix of df
+    n_simulated = n_restored if stopped_early else len(df)
+    if n_restored == len(df) or stopped_early:
+        pass
+    elif config['mode'] == 'receding_horizon':
+        controller = RecedingHorizonController(forecast_length, algorithm=algorithm, algorithm_kwargs=kwargs, fitness_fn=fitness_fn, batch_fitness_fn=moer_min_batch)
+        state_vector, temp_vector = controller.run(fridge, moer_vector[n_restored:])
+        fridge.record_data(df.index[n_restored:], state_vector, temp_vector)
+    elif config['mode'] == 'global':
+        state_vector, _, _ = global_optimize(moer_vector, fridge)
+        temp_vector = fridge.calculate_fridge_temp_vector(state_vector)
+        fridge.record_data(df.index, state_vector, temp_vector)
+    else:
+        #baseline states always cover one hour (12 steps), optimized windows cover forecast_length steps
+        step_size = 12 if config['mode'] == 'baseline' else forecast_length
+        for i in range(n_restored, len(df), step_size):
+            window = moer_vector[i:i+step_size]
+            if config['mode'] == 'baseline':
+                best_state = baseline(fridge_temp=fridge.current_temp)[:len(window)]
+            elif config['mode'] == 'robust':
+                best_state, stats = robust.solve(window, fridge.current_temp, fridge.heat_rate, fridge.cool_rate, window=i//step_size)
+                window_stats.append(stats)
+            else:
+                best_state, _, _ = optimize(len(window), fitness_fn, algorithm, algorithm_kwargs=kwargs, batch_fitness_fn=moer_min_batch,
+                                            moer_vector=window, fridge_temp=fridge.current_temp,
+                                            heat_rate=fridge.heat_rate, cool_rate=fridge.cool_rate)
+            fridge.record_data(df.index[i:i+len(window)], best_state, fridge.calculate_fridge_temp_vector(best_state))
+            if _over_limit(fridge, config):
+                stopped_early = True
+                n_simulated = i+len(window)
+                break
+    if cache:
+        #early stopped runs only save the rows they simulated, the rest of df was never written
+        cache.save(config, fridge, n_simulated)
+    wall_time = time.perf_counter()-start
+
+    totals = fridge.running_totals()
+    robust_stats = robust_summary(window_stats, watts=fridge.watts, minutes=fridge.time_step_minutes) if window_stats else {}
+    return dict(config,
+                total_co2_lbs=totals['co2_lbs'],
+                run_time_min=fridge.running_time,
+                average_temp=totals['average_temp'],
+                wall_time_s=wall_time,
+                stopped_early=stopped_early,
+                **robust_stats)
+
+def _over_limit(fridge, config):
+    """helper function for whether a run's CO2 so far is above config['max_co2_lbs']
+    """
+    return config['max_co2_lbs'] is not None and fridge.running_totals()['co2_lbs'] > config['max_co2_lbs']
+
+def _init_worker(moer_df):
+    global _moer_df
+    _moer_df = moer_df
+
+def run_sweep(moer_df, grid, processes=None):
+    """Runs every scenario in grid in a process pool and collects the summaries into one table.
+
+    Args:
+        moer_df (pd.DataFrame): MOER data with 'timestamp' and 'MOER', sent once to each worker.
+        grid (list): list of config dicts, ex: from parameter_grid().
+        processes (int, optional): number of worker processes. Defaults to all cores.
+
+    Returns:
+        (pd.DataFrame): one row of config and results per scenario, in grid order.
+    """
+    #only ship the columns the simulation needs, with timestamps parsed once
+    moer_df = moer_df[['timestamp', 'MOER']].copy()
+    moer_df['timestamp'] = pd.to_datetime(moer_df.timestamp)
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(moer_df,)) as pool:
+        results = pool.map(run_scenario, grid, chunksize=1)
+    return pd.DataFrame(results)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+def synthetic_moer_df(days=1, start_dt='2019-03-01 00:00:00+00:00', freq='5min', base=1000, daily_amplitude=250,
+                        weekly_amplitude=50, seasonal_amplitude=100, noise=40, random_state=1):
+    """Generates MOER data with a realistic shape for benchmarks and tests: a diurnal cycle (low overnight and
+        midday, peaking in the evening), a weekday/weekend cycle, a yearly seasonal cycle and autocorrelated noise.
+
+    Args:
+        days (int/float, optional): length of the data in days, ex: 1 to 3650 (ten years). Defaults to 1.
+        start_dt (string/obj, optional): first timestamp. Defaults to '2019-03-01 00:00:00+00:00'.
+        freq (str, optional): time step. Defaults to '5min'.
+        base (float, optional): mean MOER (lbs/MWh). Defaults to 1000.
+        daily_amplitude (float, optional): size of the diurnal cycle. Defaults to 250.
+        weekly_amplitude (float, optional): extra MOER on weekdays vs weekends. Defaults to 50.
+        seasonal_amplitude (float, optional): size of the yearly cycle. Defaults to 100.
+        noise (float, optional): standard deviation of the autocorrelated noise. Defaults to 40.
+        random_state (int, optional): seed for the noise. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: df with 'timestamp' (UTC) and 'MOER' columns, like data/MOERS.csv
+    """
+    start = pd.Timestamp(start_dt)
+    periods = int(pd.Timedelta(days=days)/pd.Timedelta(freq))
+    time_stamps = pd.date_range(start=start, periods=periods, freq=freq, tz=None if start.tzinfo else 'UTC')
+
+    hours = (time_stamps.hour + time_stamps.minute/60).values
+    days_of_year = time_stamps.dayofyear.values
+    #evening peak with a smaller morning shoulder
+    daily = np.cos(2*np.pi*(hours-19)/24) + 0.3*np.cos(4*np.pi*(hours-8)/24)
+    weekly = np.where(time_stamps.dayofweek.values < 5, 1.0, -1.0)
+    seasonal = np.cos(2*np.pi*(days_of_year-200)/365.25)
+
+    #AR(1) noise so neighbouring time steps are correlated like real MOER
+    rng = np.random.RandomState(random_state)
+    shocks = rng.normal(0, noise*np.sqrt(1-0.95**2), periods)
+    ar_noise = lfilter([1], [1, -0.95], shocks)
+
+    moer = base + daily_amplitude*daily + weekly_amplitude*weekly + seasonal_amplitude*seasonal + ar_noise
+    return pd.DataFrame({'timestamp': time_stamps, 'MOER': np.clip(moer, 0, None)})
@@ -1,15 +1,62 @@
+import numpy as np
 import pandas as pd 
 
-def prep_df(moer_df, start_dt, end_dt):
+class MOERForecast():
+    """MOER data held as a contiguous array with an O(1) timestamp to position lookup. 
+        Positions are the row positions of the df it was built from, which are also the df indexes after prep_df.
+
+    Attributes:
+        moer (np.array): read only float64 MOER data, forecast windows are views into it
+        timestamps (np.array): int64 UTC nanoseconds of each row
+        step (int): nanoseconds between time steps (smallest gap between consecutive rows)
+    """
+    def __init__(self, moer_df):
+        self.moer = np.ascontiguousarray(moer_df.MOER.values, dtype=np.float64)
+        self.moer.setflags(write=False)
+        #UTC nanoseconds so daylight savings changes can't duplicate or skip timestamps
+        self.timestamps = pd.to_datetime(moer_df.timestamp, utc=True).values.astype('int64')
+        self.start = self.timestamps[0] if len(self.timestamps) else 0
+
+        #dense grid of offsets from the first timestamp, -1 where the data has a gap
+        gaps = np.diff(self.timestamps)
+        self.step = int(gaps[gaps>0].min()) if (gaps>0).any() else 1
+        offsets = self.timestamps-self.start
+        if (offsets % self.step != 0).any() or (gaps <= 0).any():
+            raise ValueError('MOER timestamps must be sorted, unique and on a regular time step')
+        self._grid = np.full(int(offsets[-1]//self.step)+1 if len(offsets) else 0, -1, dtype=np.int64)
+        self._grid[offsets//self.step] = np.arange(len(offsets))
+
+    def __len__(self):
+        return len(self.moer)
+
+    def position(self, time_stamp):
+        """Row position of time_stamp (naive timestamps are treated as UTC). Raises KeyError if it is not in the data.
+        """
+        time_stamp = pd.Timestamp(time_stamp)
+        time_stamp = time_stamp.tz_localize('UTC') if time_stamp.tzinfo is None else time_stamp.tz_convert('UTC')
+        offset, remainder = divmod(time_stamp.value-self.start, self.step)
+        if remainder != 0 or offset < 0 or offset >= len(self._grid) or self._grid[offset] < 0:
+            raise KeyError(f'{time_stamp} not in MOER data')
+        return int(self._grid[offset])
+
+    def window(self, time_stamp, forecast_length):
+        """Zero-copy view of the MOER data for forecast_length time steps starting at time_stamp.
+        """
+        position = self.position(time_stamp)
+        return self.moer[position:position+forecast_length]
+
+def prep_df(moer_df, start_dt, end_dt, return_forecast=False):
     """Basic data operations to preprocess dataframe of MOER data 
 
     Args:
         moer_df (pd.DataFrame): df with timestamps and MOER forecast data
         start_dt (string/obj): starting datetime for period of simulatation
         end_dt (string/obj): ending datetime for period of simulatation
+        return_forecast (bool, optional): also return a MOERForecast of the clipped data for fast lookups. Defaults to False.
 
     Returns:
         pd.DataFrame: MOER data clipped to period of simulation and with new columns ['status','recorded_temp']
+        MOERForecast: only if return_forecast, to be used in place of the df in get_forecast_idxs/get_hr_forecast
     """
     moer_df.timestamp=pd.to_datetime(moer_df.timestamp)
     moer_df['status']=0
@@ -17,19 +64,25 @@ def prep_df(moer_df, start_dt, end_dt):
     end_dt = pd.Timestamp(end_dt)+pd.Timedelta(55,'minutes')
     moer_df = moer_df.set_index('timestamp')[start_dt:end_dt]
     moer_df.reset_index(inplace=True)
+    if return_forecast:
+        return moer_df, MOERForecast(moer_df)
     return moer_df
 
 def get_forecast_idxs(moer_df, current_time_stamp, forecast_length):
     """helper function to get indexes of timestamps of available forecast period.
 
     Args:
-        moer_df (pd.DataFrame): df with timestamps and MOER forecast data
+        moer_df (pd.DataFrame or MOERForecast): df with timestamps and MOER forecast data, a MOERForecast avoids scanning the df
         current_time_stamp (pd.DateTime obj): current time stamp to the start the forecast from 
         forecast_length (int): length of available forecast in # of periods
 
     Returns:
         (list): list of indexes
     """
+    if isinstance(moer_df, MOERForecast):
+        ts_idx = moer_df.position(current_time_stamp)
+        return list(range(ts_idx, min(ts_idx+forecast_length, len(moer_df))))
+
     #find index of current time stamp
     ts_idx = moer_df.loc[moer_df.timestamp==current_time_stamp].index[0]
     
@@ -41,12 +94,15 @@ def get_hr_forecast(moer_df, indexes):
     """Get vector of future MOER emissions data 
 
     Args:
-        moer_df (pd.DataFrame): indexed df with MOER data in col 'MOER' and timestamp in col 'timestamp'
-        indexes (list): df indexes of time steps  
+        moer_df (pd.DataFrame or MOERForecast): indexed df with MOER data in col 'MOER' and timestamp in col 'timestamp'
+        indexes (list): df indexes of time steps (consecutive when moer_df is a MOERForecast)
 
     Returns:
-        (np.array): array of the MOER data for each period available in the forecast
+        (np.array): array of the MOER data for each period available in the forecast (a read only view for a MOERForecast)
     """
+    if isinstance(moer_df, MOERForecast):
+        return moer_df.moer[indexes[0]:indexes[0]+len(indexes)]
+
     #get forecast MOER data into vector
     moer_vect_hr = moer_df.loc[indexes]['MOER'].values
     return moer_vect_hr
@@ -0,0 +1,44 @@
+import json
+import pytest
+try:
+    from src.benchmark import *
+except ImportError:
+    pytest.skip('mlrose is not importable', allow_module_level=True)
+
+def run(seconds, name='moer_min', days=None):
+    return {'results':[{'name':name, 'days':days, 'seconds':seconds, 'unit':'s/call'}]}
+
+def test_find_regressions_threshold():
+    history = [run(1.0), run(1.2), run(0.9)]
+    assert find_regressions([run(1.4)['results'][0]], history) == []
+    regressions = find_regressions([run(1.6)['results'][0]], history)
+    assert len(regressions) == 1
+    assert regressions[0]['baseline_seconds'] == 1.0 and regressions[0]['ratio'] == 1.6
+    assert find_regressions([run(1.3)['results'][0]], history, threshold=1.25) == [dict(run(1.3)['results'][0], baseline_seconds=1.0, ratio=1.3)]
+
+def test_find_regressions_noise():
+    #a timing within the spread of the recent runs isn't flagged, even when well above their median
+    history = [run(1.0), run(1.0), run(3.5)]
+    assert find_regressions([run(3.0)['results'][0]], history) == []
+    #only the last window runs count, and too few runs are no baseline
+    assert find_regressions([run(3.0)['results'][0]], [run(5.0)]*5 + history, window=3) == []
+    assert find_regressions([run(9.0)['results'][0]], history[:2]) == []
+
+def test_find_regressions_missing_baseline():
+    history = [run(1.0, days=1), run(1.0, days=1), run(1.0, days=1)]
+    #days=None (micro benchmarks) and days=1 are different benchmarks, as are different names
+    assert find_regressions([run(9.0)['results'][0], run(9.0, name='report', days=1)['results'][0]], history) == []
+    assert len(find_regressions([run(9.0, days=1)['results'][0]], history)) == 1
+
+def test_save_and_load_history(tmp_path):
+    history_path = str(tmp_path/'reports'/'history.jsonl')
+    assert load_history(history_path) == []
+    results = run(1.0)['results']
+    save_run(results, history_path)
+    save_run(results, history_path)
+    history = load_history(history_path)
+    assert len(history) == 2
+    assert history[0]['results'] == results and history[0]['results'][0]['days'] is None
+    assert {'time', 'commit', 'python', 'numpy', 'pandas'} <= set(history[0])
+    with open(history_path) as f:
+        assert all(json.loads(line) for line in f)
@@ -0,0 +1,48 @@
+import itertools
+import numpy as np
+from src.refrigerator import *
+from src.dynamic_programming import *
+import pytest
+
+def mock_fridge(starting_temp=38):
+    fridge = Refrigerator(starting_temp=starting_temp)
+    fridge.set_lapse_rates()
+    return fridge
+
+def brute_force(moer_vector, fridge):
+    best = np.inf
+    for state in itertools.product([0,1], repeat=len(moer_vector)):
+        temps = fridge.current_temp + np.cumsum(np.where(np.array(state)==1, -fridge.cool_rate, fridge.heat_rate))
+        if temps.min() >= 33-1e-6 and temps.max() <= 43+1e-6:
+            best = min(best, np.dot(state, moer_vector))
+    return best
+
+def test_global_optimize_matches_brute_force():
+    rng = np.random.RandomState(1)
+    for starting_temp in [33, 38, 43]:
+        fridge = mock_fridge(starting_temp)
+        fridge.set_lapse_rates(heat_rate=60, cool_rate=120)
+        moer_vector = rng.uniform(0, 100, 14)
+        state_vector, temp_vector, total_moer = global_optimize(moer_vector, fridge)
+        assert np.isclose(total_moer, brute_force(moer_vector, fridge))
+        assert np.isclose(total_moer, np.dot(state_vector, moer_vector))
+
+def test_global_optimize_temps_match_refrigerator():
+    fridge = mock_fridge()
+    moer_vector = 1000 + 300*np.sin(np.arange(2000)*2*np.pi/288)
+    state_vector, temp_vector, _ = global_optimize(moer_vector, fridge)
+    assert fridge.current_temp == 38
+    assert list(temp_vector) == fridge.calculate_fridge_temp_vector(state_vector)
+    assert temp_vector.min() >= 33 and temp_vector.max() <= 43
+
+def test_global_optimize_pre_cools():
+    #cheap hour followed by an expensive one: cool as much as possible while it's cheap
+    fridge = mock_fridge(starting_temp=43)
+    moer_vector = np.concatenate([np.full(12, 100.0), np.full(12, 1000.0)])
+    state_vector, _, _ = global_optimize(moer_vector, fridge)
+    assert state_vector[12:].sum() == 0
+
+def test_global_optimize_infeasible():
+    fridge = mock_fridge(starting_temp=60)
+    with pytest.raises(ValueError):
+        global_optimize(np.ones(12), fridge)
@@ -0,0 +1,43 @@
+import numpy as np
+from src.refrigerator import *
+from src.state_table import *
+from src.fleet import *
+import pytest
+
+def mock_fleet():
+    rng = np.random.RandomState(1)
+    fleet = RefrigeratorFleet(starting_temps=rng.uniform(34, 42, 50), watts=rng.choice([150,200,250], 50))
+    fleet.set_lapse_rates(heat_rate=rng.choice([4,5,6], 50), cool_rate=rng.choice([9,10], 50))
+    moer_vector = 1000 + 300*np.sin(np.arange(48)*2*np.pi/24)
+    return fleet, moer_vector
+
+def test_set_lapse_rates():
+    fleet = RefrigeratorFleet(starting_temps=[33,38])
+    fleet.set_lapse_rates(heat_rate=[5,6], cool_rate=10, minutes=60)
+    assert list(fleet.heat_rate) == [5,6]
+    assert list(fleet.cool_rate) == [10,10]
+
+def test_step_matches_refrigerator():
+    fleet = RefrigeratorFleet(starting_temps=[43,43])
+    fleet.set_lapse_rates()
+    fridge = Refrigerator(starting_temp=43)
+    fridge.set_lapse_rates()
+    for state in [1,1,0,1,0,0,1]:
+        fleet.step([state, 1-state])
+        fridge.calculate_fridge_temp_vector([state])
+    assert fleet.current_temp[0] == fridge.current_temp
+    assert fleet.running_time[0] == fridge.running_time
+
+def test_optimize_matches_exact_search():
+    fleet, moer_vector = mock_fleet()
+    best_states = fleet.optimize(moer_vector[:12], block_size=7)
+    for unit in range(fleet.n_units):
+        expected, _, _ = exact_search(12, moer_vector[:12], fleet.current_temp[unit], fleet.heat_rate[unit], fleet.cool_rate[unit])
+        assert np.isclose(best_states[unit]@moer_vector[:12], expected@moer_vector[:12])
+
+def test_simulate_carbon_accounting():
+    fleet, moer_vector = mock_fleet()
+    fleet_watts = fleet.simulate(moer_vector)
+    assert len(fleet_watts) == len(fleet.carbon_history) == len(moer_vector)
+    assert np.isclose(fleet.total_carbon, (fleet_watts/1000000*(5/60)*moer_vector).sum())
+    assert fleet.current_temp.min() >= 33 - 1e-3 and fleet.current_temp.max() <= 43 + 1e-3
@@ -0,0 +1,79 @@
+import json
+from src.instrumentation import *
+from src.state_table import INFEASIBLE_FITNESS
+import pytest
+
+def mock_fitness(state, infeasible=False):
+    return INFEASIBLE_FITNESS if infeasible else sum(state)
+
+def test_timers_and_counters():
+    metrics = Metrics()
+    for _ in range(3):
+        with metrics.timer('optimize'):
+            pass
+    metrics.count('hours')
+    metrics.count('optimizer_iterations', 10)
+    summary = metrics.summary()
+    assert summary['timers']['optimize']['count'] == 3
+    assert summary['timers']['optimize']['max_s'] <= summary['timers']['optimize']['total_s']
+    assert summary['counters'] == {'hours':1, 'optimizer_iterations':10}
+
+def test_disabled_metrics_collect_nothing():
+    metrics = Metrics(enabled=False)
+    with metrics.timer('optimize'):
+        metrics.count('hours')
+    assert metrics.wrap_fitness(mock_fitness) is mock_fitness
+    assert metrics.summary() == {'timers':{}, 'counters':{}}
+
+def test_wrap_fitness():
+    metrics = Metrics()
+    fitness_fn = metrics.wrap_fitness(mock_fitness)
+    assert fitness_fn([1,1]) == 2
+    assert fitness_fn([1,1], infeasible=True) == INFEASIBLE_FITNESS
+    assert metrics.counters == {'fitness_calls':2, 'infeasible_proposals':1}
+
+def test_wrap_batch_fitness():
+    metrics = Metrics()
+    batch_fitness_fn = metrics.wrap_batch_fitness(lambda states: [INFEASIBLE_FITNESS if state[0] else sum(state) for state in states])
+    assert batch_fitness_fn([[0,1], [1,1], [0,0]]) == [1, INFEASIBLE_FITNESS, 0]
+    assert metrics.counters == {'fitness_calls':3, 'infeasible_proposals':1}
+    assert Metrics(enabled=False).wrap_batch_fitness(mock_fitness) is mock_fitness
+
+def test_wrap_fitness_genetic_alg():
+    try:
+        from src.optimization import optimize, moer_min, moer_min_batch, mlrose
+    except ImportError:
+        pytest.skip('mlrose is not importable')
+    rows = {'calls':0, 'infeasible':0}
+    def recorded_batch(states, **kwargs):
+        fitness = moer_min_batch(states, **kwargs)
+        rows['calls'] += len(fitness)
+        rows['infeasible'] += int((fitness == INFEASIBLE_FITNESS).sum())
+        return fitness
+    def recorded_single(state, **kwargs):
+        fitness = moer_min(state, **kwargs)
+        rows['calls'] += 1
+        rows['infeasible'] += int(fitness == INFEASIBLE_FITNESS)
+        return fitness
+
+    metrics = Metrics()
+    optimize(12, metrics.wrap_fitness(recorded_single), mlrose.genetic_alg,
+             algorithm_kwargs={'pop_size':50, 'max_attempts':3, 'max_iters':5, 'random_state':1, 'curve':True},
+             batch_fitness_fn=metrics.wrap_batch_fitness(recorded_batch),
+             moer_vector=[1000]*12, fridge_temp=42, heat_rate=0.4167, cool_rate=0.8333)
+    #every population row is counted, not only the single state calls
+    assert metrics.counters['fitness_calls'] == rows['calls'] >= 50
+    assert metrics.counters.get('infeasible_proposals', 0) == rows['infeasible'] > 0
+
+def test_exports(tmp_path):
+    metrics = Metrics()
+    with metrics.timer('record_data'):
+        metrics.count('fitness_calls', 5)
+    metrics.to_json(str(tmp_path/'metrics.json'))
+    metrics.to_prometheus(str(tmp_path/'metrics.prom'))
+    with open(tmp_path/'metrics.json') as f:
+        assert json.load(f)['counters']['fitness_calls'] == 5
+    prom = (tmp_path/'metrics.prom').read_text()
+    assert 'refrigerator_sim_phase_calls_total{phase="record_data"} 1' in prom
+    assert 'refrigerator_sim_fitness_calls_total 5' in prom
+    assert '# TYPE refrigerator_sim_phase_seconds_total counter' in prom
@@ -0,0 +1,46 @@
+import pandas as pd
+import numpy as np
+from src.moer_store import *
+from src.utils import *
+import pytest
+
+def mock_csv(tmp_path):
+    time_series = pd.date_range(start='2019-03-01 00:00:00+00:00', end='2019-03-02 23:55:00+00:00', freq='5min')
+    moer_df = pd.concat([pd.DataFrame({'timestamp':time_series.astype(str), 'MOER':np.arange(len(time_series))+offset, 'ba':ba})
+                            for ba, offset in [('CAISO_NORTH', 0), ('PJM', 10000)]])
+    csv_path = str(tmp_path/'MOERS.csv')
+    moer_df.to_csv(csv_path, index=False)
+    return csv_path, moer_df
+
+def test_append_csv_regions(tmp_path):
+    csv_path, moer_df = mock_csv(tmp_path)
+    store = MOERStore(str(tmp_path/'store'))
+    store.append_csv(csv_path, region_col='ba', chunksize=100)
+    assert store.regions() == ['CAISO_NORTH', 'PJM']
+    assert store.length('PJM') == len(moer_df)//2
+    assert isinstance(store.columns('PJM')['MOER'], np.memmap)
+
+def test_to_df_matches_prep_df(tmp_path):
+    csv_path, moer_df = mock_csv(tmp_path)
+    store = MOERStore(str(tmp_path/'store'))
+    store.append_csv(csv_path, region_col='ba', chunksize=100)
+    start_dt, end_dt = '2019-03-01 10:00:00+00:00', '2019-03-01 20:00:00+00:00'
+    expected = prep_df(moer_df[moer_df.ba=='PJM'].drop(columns='ba').reset_index(drop=True), start_dt, end_dt)
+    df = prep_df(store.to_df('PJM', start_dt, pd.Timestamp(end_dt)+pd.Timedelta(1,'h')), start_dt, end_dt)
+    assert list(df.MOER) == list(expected.MOER)
+    assert list(df.timestamp) == list(expected.timestamp)
+
+def test_iter_windows(tmp_path):
+    csv_path, _ = mock_csv(tmp_path)
+    store = MOERStore(str(tmp_path/'store'))
+    store.append_csv(csv_path, region_col='ba')
+    windows = list(store.iter_windows('CAISO_NORTH', '2019-03-01 00:00:00', '2019-03-01 01:55:00', 12))
+    assert [list(moer) for _, moer in windows] == [list(range(12)), list(range(12, 24))]
+
+def test_append_out_of_order(tmp_path):
+    store = MOERStore(str(tmp_path/'store'))
+    store.append('PJM', ['2019-03-01 00:05:00'], [1])
+    with pytest.raises(ValueError):
+        store.append('PJM', ['2019-03-01 00:00:00'], [1])
+    with pytest.raises(KeyError):
+        store.columns('CAISO_NORTH')
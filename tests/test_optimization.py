@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from src.refrigerator import Refrigerator
+try:
+    from src.optimization import *
+except ImportError:
+    pytest.skip('mlrose is not importable', allow_module_level=True)
+
+def test_moer_min_batch_matches_moer_min():
+    rng = np.random.RandomState(1)
+    moer_vector = rng.uniform(500, 1500, size=12)
+    states = rng.randint(0, 2, size=(200, 12))
+    for fridge_temp in [33, 38, 43]:
+        batch = moer_min_batch(states, moer_vector, fridge_temp, 0.4167, 0.8333)
+        single = [moer_min(state, moer_vector, fridge_temp, 0.4167, 0.8333) for state in states]
+        assert np.allclose(batch, single)
+
+def test_optimize_exact_search():
+    moer_vector = np.array([0,0,0,0,100,100,100,100,0,0,0,0])
+    best_state, best_fitness, curve = optimize(12, moer_min, exact_search, algorithm_kwargs={}, 
+                                                moer_vector=moer_vector, fridge_temp=38, heat_rate=0.4167, cool_rate=0.8333)
+    assert best_fitness == 0
+    assert list(best_state[4:8]) == [0,0,0,0]
+
+def test_optimize_genetic_alg_batched():
+    moer_vector = np.linspace(100, 1200, 12)
+    algorithm_kwargs = {'pop_size':50, 'max_attempts':5, 'max_iters':5, 'random_state':1, 'curve':True}
+    best_state, best_fitness, _ = optimize(12, moer_min, mlrose.genetic_alg, algorithm_kwargs=algorithm_kwargs, 
+                                            batch_fitness_fn=moer_min_batch, moer_vector=moer_vector, 
+                                            fridge_temp=38, heat_rate=0.4167, cool_rate=0.8333)
+    assert best_fitness == moer_min(best_state, moer_vector, 38, 0.4167, 0.8333)
+
+def test_fitness_cache_matches_moer_min():
+    rng = np.random.RandomState(1)
+    cache = FitnessCache(maxsize=50)
+    for fridge_temp in [33, 38.4167, 43]:
+        moer_vector = rng.uniform(500, 1500, size=12)
+        for state in rng.randint(0, 2, size=(100, 12)):
+            assert np.isclose(cache(state, moer_vector, fridge_temp, 0.4167, 0.8333), moer_min(state, moer_vector, fridge_temp, 0.4167, 0.8333))
+    assert cache.cache_info()['size'] == 50
+
+def test_fitness_cache_reused_across_hours():
+    cache = FitnessCache()
+    state = np.array([1,0,1,0,0,0,0,0,0,0,0,0])
+    cache(state, np.ones(12), 38, 0.4167, 0.8333)
+    assert cache(state, np.full(12, 2.0), 38, 0.4167, 0.8333) == 4
+    assert cache.hits == 1 and cache.misses == 1
+    assert cache.hit_rate == 0.5
+
+def test_moer_min_matches_refrigerator():
+    rng = np.random.RandomState(2)
+    fridge = Refrigerator(starting_temp=33)
+    fridge.set_lapse_rates()
+    for fridge_temp in (33, 33.8333, 42.5833, 43):
+        for state in rng.randint(0, 2, (200, 12)):
+            fridge.current_temp = fridge_temp
+            temps = fridge.calculate_fridge_temp_vector(state)
+            in_range = 33 <= min(temps) and max(temps) <= 43
+            assert (moer_min(state, np.ones(12), fridge_temp, fridge.heat_rate, fridge.cool_rate) != INFEASIBLE_FITNESS) == in_range
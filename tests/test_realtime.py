@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from src.refrigerator import Refrigerator
+try:
+    from src.realtime import *
+except ImportError:
+    pytest.skip('mlrose is not importable', allow_module_level=True)
+
+MOER = 1000 + 300*np.sin(np.arange(288)*2*np.pi/288)
+
+def test_fallback_state():
+    for fridge_temp in np.arange(33, 43.01, 0.25):
+        fridge = Refrigerator(starting_temp=fridge_temp)
+        fridge.set_lapse_rates()
+        temps = fridge.calculate_fridge_temp_vector(fallback_state(fridge_temp, fridge.heat_rate, fridge.cool_rate, 12))
+        assert 33 <= min(temps) and max(temps) <= 43
+
+def test_anytime_annealer():
+    kwargs = {'moer_vector':MOER[:12], 'fridge_temp':38, 'heat_rate':0.4167, 'cool_rate':0.8333}
+    annealer = AnytimeAnnealer(12, moer_min, random_state=1, **kwargs)
+    start_fitness = annealer.best_fitness
+    best_state = annealer.run(200)
+    assert annealer.iters == 200
+    assert annealer.best_fitness <= start_fitness
+    assert moer_min(best_state, **kwargs) == annealer.best_fitness
+    #same seed, same search
+    assert (AnytimeAnnealer(12, moer_min, random_state=1, **kwargs).run(200) == best_state).all()
+
+def test_realtime_controller():
+    async def run():
+        async with StubMOERServer(MOER) as server:
+            client = MOERClient(server.host, server.port)
+            fridges = [Refrigerator(starting_temp=t) for t in (33, 38, 43)]
+            for fridge in fridges:
+                fridge.set_lapse_rates()
+            controller = RealtimeController(fridges, client, budget_s=0.005)
+            state_matrix, temp_matrix = await controller.run(24)
+            with pytest.raises(ValueError):
+                await client.forecast(len(MOER), 12)
+            await client.close()
+            return controller, state_matrix, temp_matrix
+
+    controller, state_matrix, temp_matrix = run_async(run())
+    assert state_matrix.shape == temp_matrix.shape == (24, 3)
+    assert ((temp_matrix >= 33) & (temp_matrix <= 43)).all()
+    summary = controller.latency_summary()
+    assert summary['decisions'] == 72
+    assert summary['p50_ms'] <= summary['p99_ms'] <= summary['max_ms']
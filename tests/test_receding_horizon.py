@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from src.refrigerator import *
+try:
+    from src.receding_horizon import *
+except ImportError:
+    pytest.skip('mlrose is not importable', allow_module_level=True)
+
+def mock_moer(n_steps=600):
+    #daily shaped MOER with some noise, 5 minute steps
+    rng = np.random.RandomState(1)
+    return 1000 + 300*np.sin(np.arange(n_steps)*2*np.pi/288) + rng.uniform(-50, 50, n_steps)
+
+def run_controller(**kwargs):
+    fridge = Refrigerator(starting_temp=38)
+    fridge.set_lapse_rates()
+    controller = RecedingHorizonController(**kwargs)
+    state_vector, temp_vector = controller.run(fridge, mock_moer())
+    return controller, state_vector, temp_vector
+
+def test_run_exact_search():
+    controller, state_vector, temp_vector = run_controller()
+    assert controller.n_solves == len(state_vector) == len(temp_vector) == 600
+    assert min(temp_vector) >= 33 - 1e-3 and max(temp_vector) <= 43 + 1e-3
+    assert controller.solves_per_second > 0
+
+def test_block_size_does_not_change_schedule():
+    _, blocked, _ = run_controller(block_size=288)
+    _, unblocked, _ = run_controller(block_size=1)
+    assert list(blocked) == list(unblocked)
+
+def test_warm_start():
+    controller = RecedingHorizonController()
+    assert controller.warm_start(12) is None
+    controller.previous_state = np.array([1,0,0,1])
+    assert list(controller.warm_start(4)) == [0,0,1,1]
+    assert list(controller.warm_start(3)) == [0,0,1]
+
+def test_run_simulated_annealing():
+    algorithm_kwargs = {'max_attempts':10, 'max_iters':10, 'random_state':1, 'schedule':mlrose.ExpDecay(), 'curve':True}
+    controller, state_vector, _ = run_controller(algorithm=mlrose.simulated_annealing, algorithm_kwargs=algorithm_kwargs)
+    assert controller.n_solves == len(state_vector)
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 from src.refrigerator import *
+from src.utils import prep_df
+from src.synthetic import synthetic_moer_df
 import pytest
 
 def mock_data():
@@ -43,3 +45,119 @@ def test_calc_carbon_footprint():
     assert fridge.data['MWH'].sum()==(fridge.watts/1000000*len(fridge.data))
     assert np.round(fridge.data.iloc[-1]['marginal_carbon_cumu_sum'],3)==fridge.data['marginal_carbon_footprint_hr'].sum()
 
+
+def test_record_data_buffered():
+    fridge=mock_data()
+    fridge.set_lapse_rates(5,10,5)
+    temp_vector = fridge.calculate_fridge_temp_vector([0,0])
+    fridge.record_data([2,3], [0,0], temp_vector)
+    assert fridge._unflushed
+    assert list(fridge.data.recorded_temp[2:4]) == temp_vector
+    assert list(fridge.data.status[1:5]) == [1,0,0,1]
+    assert not fridge._unflushed
+
+def test_record_data_non_range_index():
+    fridge=mock_data()
+    fridge.data = fridge.data.set_index('timestamp')
+    fridge.record_data(fridge.data.index[[5]], [0], [38.4167])
+    assert fridge.data.iloc[5]['status']==0
+    assert fridge.data.iloc[5]['recorded_temp']==38.4167
+
+def test_summary_matches_report(tmp_path, capsys):
+    fridge=mock_data()
+    fridge.report(summary_only=True)
+    summary_only = capsys.readouterr().out
+    fridge.report(file_path=str(tmp_path/'report.jpg'), figsize=(4,2), dpi=50)
+    report_out = capsys.readouterr().out
+    assert (tmp_path/'report.jpg').exists()
+    fridge._calc_carbon_footprint()
+    summary = fridge.summary()
+    assert np.isclose(summary['total_co2_lbs'], fridge.data.marginal_carbon_footprint_hr.sum())
+    assert summary['running_min_per_hour'] == fridge.data_to_plot.total_time_running_min.mean()
+    assert np.isclose(summary['average_temp'], fridge.data.recorded_temp.mean())
+    assert summary_only == report_out
+
+def test_summary_of_assigned_data(capsys):
+    fridge=mock_data()
+    summary = fridge.summary()
+    #results assigned as a frame, not through record_data
+    fridge.data = fridge.data.copy()
+    assert fridge.running_totals()['steps'] == 0
+    for name, value in fridge.summary().items():
+        assert np.isclose(value, summary[name])
+    fridge.print_summary()
+    assert 'nan' not in capsys.readouterr().out
+
+def test_summary_does_not_flush():
+    fridge=mock_data()
+    summary = fridge.summary()
+    assert fridge._unflushed
+    assert summary['run_time_min'] == fridge.running_time
+    assert np.isclose(summary['total_co2_lbs'], np.dot(fridge.data.status, fridge.data.MOER)*(200/1000000))
+
+def test_min_max_decimate():
+    x = np.arange(10000)
+    y = np.sin(x/100.0)
+    y[1234] = 50
+    y[4321] = -50
+    x_small, y_small = min_max_decimate(x, y, 200)
+    assert len(x_small) <= 202
+    assert y_small.max() == 50 and y_small.min() == -50
+    assert (np.diff(x_small) > 0).all()
+    x_same, y_same = min_max_decimate(x[:100], y[:100], 200)
+    assert len(x_same) == 100
+
+def test_running_totals():
+    fridge=mock_data()
+    totals = fridge.running_totals()
+    fridge._calc_carbon_footprint()
+    assert totals['steps'] == 24
+    assert np.isclose(totals['co2_lbs'], fridge.data.marginal_carbon_footprint_hr.sum())
+    assert np.isclose(totals['mwh'], fridge.data.MWH.sum())
+    assert totals['run_time_min'] == fridge.data.total_time_running_min.sum()
+    assert np.isclose(totals['average_temp'], fridge.data.recorded_temp.mean())
+    assert totals['min_temp'] == fridge.data.recorded_temp.min()
+
+    #re-recording steps replaces them in the totals
+    fridge.record_data([4,5], [0,0], [40,41])
+    totals = fridge.running_totals()
+    fridge._calc_carbon_footprint()
+    assert totals['steps'] == 24
+    assert np.isclose(totals['co2_lbs'], fridge.data.marginal_carbon_footprint_hr.sum())
+    assert totals['max_temp'] == 41
+
+def test_running_totals_mid_run():
+    #prep_df adds zeroed status/recorded_temp columns, they must not count as recorded steps
+    moer_df = synthetic_moer_df(days=1+1/24)
+    df = prep_df(moer_df, start_dt=moer_df.timestamp.iloc[0], end_dt=moer_df.timestamp.iloc[0]+pd.Timedelta(hours=23))
+    fridge = Refrigerator(starting_temp=38, data=df)
+    fridge.set_lapse_rates()
+    state = np.array([1,0]*6)
+    temps = fridge.calculate_fridge_temp_vector(state)
+    fridge.record_data(range(12), state, temps)
+    totals = fridge.running_totals()
+    assert totals['steps'] == 12
+    assert totals['run_time_min'] == 30
+    assert np.isclose(totals['co2_lbs'], np.dot(state, df.MOER.values[:12])*(200/1000000)*(5/60))
+    assert np.isclose(totals['average_temp'], np.mean(temps))
+    assert totals['min_temp'] == min(temps) and totals['max_temp'] == max(temps)
+    #each new hour is added incrementally, not recounted
+    fridge.record_data(range(12, 24), state, fridge.calculate_fridge_temp_vector(state))
+    assert fridge.running_totals()['steps'] == 24 and fridge._recorded.sum() == 24
+
+def test_fixed_point_temps():
+    fridge = Refrigerator(starting_temp=38)
+    fridge.set_lapse_rates()
+    with pytest.raises(AttributeError):
+        fridge.unknown_attribute = 1
+    #a month of steps in one call matches stepping one at a time, without drift
+    states = np.random.RandomState(1).randint(0, 2, 8928)
+    temps = fridge.calculate_fridge_temp_vector(states)
+    stepped = Refrigerator(starting_temp=38)
+    stepped.set_lapse_rates()
+    for state in states:
+        stepped.cool() if state else stepped.heat()
+    assert temps[-1] == stepped.current_temp == fridge.current_temp
+    assert temps[-1] == round(38 + 0.4167*(len(states)-states.sum()) - 0.8333*states.sum(), 4)
+    assert fridge.running_time == stepped.running_time == states.sum()*5
+    assert fridge.status == states[-1]
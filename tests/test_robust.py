@@ -0,0 +1,45 @@
+import numpy as np
+from src.robust import *
+from src.state_table import get_state_table, to_ticks, trajectory_ticks, in_range
+
+MOER = 1000 + 300*np.sin(np.arange(12)/3)
+
+def test_violation_prob_matches_simulation():
+    robust = RobustOptimizer(n_scenarios=40, heat_noise=0.3)
+    for fridge_temp in (33, 38, 42.5, 43):
+        moer_scenarios, heat_scenarios = robust.scenarios(MOER, 0.4167, window=3)
+        table, expected, violation_prob = robust.evaluate(moer_scenarios, heat_scenarios, fridge_temp, 0.8333)
+        assert np.allclose(expected, (moer_scenarios @ table.states.T).mean(axis=0))
+        #temperature trajectories of every state in every scenario, in ticks like the nominal path
+        temps = np.stack([to_ticks(fridge_temp) + trajectory_ticks(table.states, heat_ticks, to_ticks(0.8333))
+                            for heat_ticks in to_ticks(heat_scenarios)], axis=1)
+        violated = ~in_range(temps)
+        assert np.allclose(violation_prob, violated.mean(axis=1))
+
+def test_no_noise_matches_exact():
+    robust = RobustOptimizer(n_scenarios=10, moer_noise=0, heat_noise=0, max_violation=0)
+    for fridge_temp in (33, 38, 43):
+        best_state, stats = robust.solve(MOER, fridge_temp, 0.4167, 0.8333)
+        exact_state, exact_fitness = get_state_table(12, 0.4167, 0.8333).solve(MOER, fridge_temp)
+        assert np.isclose(stats['expected'], exact_fitness)
+        assert stats['violation_prob'] == 0 and stats['std'] < 1e-9
+
+def test_band_edges_match_state_table():
+    #heat rates exactly at the band edges are in range, like StateTable.feasible
+    robust = RobustOptimizer(n_scenarios=5, heat_noise=0)
+    table = get_state_table(12, 0.4167, 0.8333)
+    for fridge_temp in (33, 33.4167, 42.5833, 43):
+        moer_scenarios, heat_scenarios = robust.scenarios(MOER, 0.4167)
+        _, _, violation_prob = robust.evaluate(moer_scenarios, heat_scenarios, fridge_temp, 0.8333)
+        assert ((violation_prob == 0) == table.feasible(fridge_temp)).all()
+
+def test_robust_summary():
+    robust = RobustOptimizer(n_scenarios=500)
+    window_stats = [robust.solve(MOER, 38, 0.4167, 0.8333, window=w)[1] for w in range(3)]
+    #same window, same scenarios
+    assert (robust.solve(MOER, 38, 0.4167, 0.8333, window=1)[1]['scenario_moer'] == window_stats[1]['scenario_moer']).all()
+    summary = robust_summary(window_stats)
+    lbs_per_moer = (200/1000000)*(5/60)
+    assert np.isclose(summary['expected_co2_lbs'], sum(stats['scenario_moer'].mean() for stats in window_stats)*lbs_per_moer)
+    assert summary['p5_co2_lbs'] < summary['p50_co2_lbs'] < summary['p95_co2_lbs']
+    assert summary['max_violation_prob'] <= robust.max_violation
@@ -0,0 +1,95 @@
+import os
+import numpy as np
+import pandas as pd
+from src.refrigerator import Refrigerator
+from src.run_cache import *
+
+class Schedule():
+    def __init__(self, init_temp):
+        self.init_temp = init_temp
+
+def mock_fridge(hours, moer_offset=0):
+    time_series = pd.date_range(start='2019-03-01 00:00:00+00:00', periods=hours*12, freq='5min')
+    moer = 1000 + 300*np.sin(np.arange(len(time_series))*2*np.pi/288) + moer_offset
+    fridge = Refrigerator(starting_temp=38, data=pd.DataFrame({'timestamp':time_series, 'MOER':moer}))
+    fridge.set_lapse_rates()
+    return fridge
+
+def simulate(fridge, start=0):
+    #alternate on/off hours
+    for i in range(start, len(fridge.data), 12):
+        state = np.full(12, (i//12)%2)
+        fridge.record_data(fridge.data.index[i:i+12], state, fridge.calculate_fridge_temp_vector(state))
+
+def test_config_key():
+    config = {'mode':'optimized', 'schedule':Schedule(1.0), 'end_dt':'2019-03-01 23:00:00+00:00'}
+    assert config_key(config) == config_key(dict(config, end_dt='2019-03-31 23:00:00+00:00', max_co2_lbs=10))
+    assert config_key(config) != config_key(dict(config, schedule=Schedule(2.0)))
+    assert not RunCache.cacheable(None, {'mode':'optimized', 'random_state':None})
+    assert RunCache.cacheable(None, {'mode':'optimized', 'algorithm':'exact', 'random_state':None})
+
+def test_restore_prefix(tmp_path):
+    cache = RunCache(str(tmp_path))
+    config = {'mode':'baseline'}
+    fridge = mock_fridge(4)
+    simulate(fridge)
+    cache.save(config, fridge)
+
+    #same data: every step is reused
+    same = mock_fridge(4)
+    assert cache.restore(config, same) == 48
+    assert (same.data.recorded_temp.values == fridge.data.recorded_temp.values).all()
+    assert same.current_temp == fridge.current_temp and same.running_time == fridge.running_time
+
+    #extended end date: only the new hours are simulated
+    longer = mock_fridge(6)
+    n_restored = cache.restore(config, longer)
+    assert n_restored == 48
+    simulate(longer, start=n_restored)
+    full = mock_fridge(6)
+    simulate(full)
+    assert (longer.data.recorded_temp.values == full.data.recorded_temp.values).all()
+    for name, value in full.running_totals().items():
+        assert np.isclose(longer.running_totals()[name], value)
+    cache.save(config, longer)
+    assert len(cache.load(config, longer.data)['status']) == 72
+
+    #different data or config: nothing is reused
+    assert cache.restore(config, mock_fridge(4, moer_offset=1)) == 0
+    assert cache.restore({'mode':'baseline', 'starting_temp':40}, mock_fridge(4)) == 0
+
+def test_reusable_steps():
+    cache = RunCache.__new__(RunCache)
+    assert cache.reusable_steps({'mode':'optimized'}, 30, 48, 72) == 24
+    assert cache.reusable_steps({'mode':'receding_horizon', 'algorithm':'exact'}, 48, 48, 72) == 37
+    assert cache.reusable_steps({'mode':'receding_horizon', 'random_state':1}, 48, 48, 72) == 0
+    assert cache.reusable_steps({'mode':'global'}, 48, 48, 72) == 0
+    assert cache.reusable_steps({'mode':'global'}, 48, 48, 48) == 48
+
+def test_datasets_sharing_a_config(tmp_path):
+    cache = RunCache(str(tmp_path))
+    config = {'mode':'baseline'}
+    for moer_offset in (0, 1):
+        fridge = mock_fridge(4, moer_offset)
+        assert cache.restore(config, fridge) == 0
+        simulate(fridge)
+        cache.save(config, fridge)
+    #each dataset has its own entry, neither run evicted the other
+    assert len(os.listdir(str(tmp_path))) == 2
+    for moer_offset in (0, 1):
+        assert cache.restore(config, mock_fridge(4, moer_offset)) == 48
+
+def test_save_replaces_mismatched_entry(tmp_path):
+    cache = RunCache(str(tmp_path))
+    config = {'mode':'baseline'}
+    fridge = mock_fridge(6)
+    simulate(fridge)
+    cache.save(config, fridge)
+    #same first hour, different data afterwards: the longer stale entry is replaced, not kept
+    other = mock_fridge(4)
+    other.data = other.data.assign(MOER=np.r_[other.data.MOER.values[:12], other.data.MOER.values[12:]+1])
+    simulate(other)
+    cache.save(config, other)
+    entry = cache.load(config, other.data)
+    assert len(entry['status']) == 48 and (entry['MOER'] == other.data.MOER.values).all()
+    assert cache.restore(config, mock_fridge(6)) == 12
@@ -0,0 +1,64 @@
+import itertools
+import numpy as np
+from src.state_table import *
+import pytest
+
+def brute_force(moer_vector, fridge_temp, heat_rate, cool_rate):
+    best_state, best_fitness = None, INFEASIBLE_FITNESS
+    for state in itertools.product([0,1], repeat=len(moer_vector)):
+        temp = fridge_temp
+        feasible = True
+        for i in state:
+            temp = temp-cool_rate if i==1 else temp+heat_rate
+            if temp > 43 or temp < 33:
+                feasible = False
+                break
+        fitness = sum(np.array(state)*moer_vector)
+        if feasible and fitness < best_fitness:
+            best_state, best_fitness = np.array(state), fitness
+    return best_state, best_fitness
+
+def test_states_enumerated():
+    table = StateTable(4, heat_rate=1, cool_rate=2)
+    assert table.states.shape == (16, 4)
+    assert len(np.unique(table.states, axis=0)) == 16
+    assert list(table.states[5]) == [0,1,0,1]
+    assert list(table.offsets[5]) == [1,-1,0,-2]
+
+def test_feasible():
+    table = StateTable(2, heat_rate=5, cool_rate=5)
+    #[off,off] from 33 -> 38, 43 ok; from 34 -> 44 too warm
+    assert table.feasible(33)[0]
+    assert not table.feasible(34)[0]
+    #[on,on] from 43 -> 38, 33 ok; from 42 -> 32 too cold
+    assert table.feasible(43)[3]
+    assert not table.feasible(42)[3]
+
+def test_exact_search_matches_brute_force():
+    rng = np.random.RandomState(1)
+    heat_rate, cool_rate = 0.4167, 0.8333
+    for fridge_temp in [33, 35.5, 38, 41.25, 43]:
+        moer_vector = rng.uniform(500, 1500, size=8)
+        best_state, best_fitness, curve = exact_search(8, moer_vector, fridge_temp, heat_rate, cool_rate)
+        expected_state, expected_fitness = brute_force(moer_vector, fridge_temp, heat_rate, cool_rate)
+        assert np.isclose(best_fitness, expected_fitness)
+        assert list(best_state) == list(expected_state)
+        assert len(curve) == 1
+
+def test_exact_search_infeasible():
+    #fridge can't cool fast enough to get back into range, so it should at least start cooling
+    best_state, best_fitness, curve = exact_search(3, np.ones(3), 60, 1, 2)
+    assert best_fitness == INFEASIBLE_FITNESS
+    assert best_state[0] == 1
+
+def test_get_state_table_cached():
+    assert get_state_table(12, 0.4167, 0.8333) is get_state_table(12, 0.4167, 0.8333)
+
+def test_trajectory_ticks():
+    assert to_ticks(0.4167) == 4167 and to_ticks(np.array([33, 42.5833])).tolist() == [330000, 425833]
+    states = np.array([[0,0,1,1,0], [1,1,1,1,1]])
+    ticks = trajectory_ticks(states, 4167, 8333)
+    assert ticks.tolist() == [[4167, 8334, -(8333-8334), -8333+1, 4167-8332], [-8333*k for k in range(1,6)]]
+    #a trajectory ending exactly on the bound is feasible
+    table = StateTable(2, 0.4167, 0.8333)
+    assert table.feasible(42.1666)[0] and not table.feasible(42.1667)[0]
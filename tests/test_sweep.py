@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+try:
+    from src.sweep import *
+except ImportError:
+    pytest.skip('mlrose is not importable', allow_module_level=True)
+
+def mock_moer_df():
+    time_series = pd.date_range(start='2019-03-01 00:00:00+00:00', end='2019-03-02 23:55:00+00:00', freq='5min')
+    moer = 1000 + 300*np.sin(np.arange(len(time_series))*2*np.pi/288)
+    return pd.DataFrame({'timestamp':time_series.astype(str), 'MOER':moer})
+
+def test_parameter_grid():
+    grid = parameter_grid(max_iters=[10,100], heat_rate=[4,5,6])
+    assert len(grid) == 6
+    assert grid[0]['max_iters'] == 10 and grid[0]['heat_rate'] == 4
+    assert grid[0]['forecast_length'] == DEFAULT_CONFIG['forecast_length']
+
+def test_run_sweep():
+    grid = parameter_grid(mode=['baseline', 'optimized', 'receding_horizon'], algorithm=['exact'], 
+                            start_dt=['2019-03-01 00:00:00+00:00'], end_dt=['2019-03-01 23:00:00+00:00'])
+    results = run_sweep(mock_moer_df(), grid, processes=2)
+    assert list(results['mode']) == ['baseline', 'optimized', 'receding_horizon']
+    baseline_co2, optimized_co2, _ = results.total_co2_lbs
+    assert optimized_co2 < baseline_co2
+    assert results.average_temp.between(33, 43).all()
+
+def test_run_scenario_early_stop():
+    config = {'mode':'baseline', 'start_dt':'2019-03-01 00:00:00+00:00', 'end_dt':'2019-03-01 23:00:00+00:00'}
+    full = run_scenario(config, mock_moer_df())
+    assert not full['stopped_early']
+    stopped = run_scenario(dict(config, max_co2_lbs=full['total_co2_lbs']/2), mock_moer_df())
+    assert stopped['stopped_early']
+    assert full['total_co2_lbs']/2 < stopped['total_co2_lbs'] < full['total_co2_lbs']
+    assert 33 <= stopped['average_temp'] <= 43
+
+def test_run_scenario_cache(tmp_path):
+    config = {'algorithm':'exact', 'start_dt':'2019-03-01 00:00:00+00:00', 'end_dt':'2019-03-01 11:00:00+00:00'}
+    cached = run_scenario(dict(config, cache_dir=str(tmp_path)), mock_moer_df())
+    assert len(os.listdir(tmp_path)) == 1
+    #extending the end date reuses the first 12 hours
+    extended = dict(config, end_dt='2019-03-01 23:00:00+00:00')
+    result = run_scenario(dict(extended, cache_dir=str(tmp_path)), mock_moer_df())
+    uncached = run_scenario(extended, mock_moer_df())
+    assert np.isclose(result['total_co2_lbs'], uncached['total_co2_lbs'])
+    assert result['run_time_min'] == uncached['run_time_min']
+    assert result['average_temp'] == uncached['average_temp']
+    assert cached['total_co2_lbs'] < result['total_co2_lbs']
+
+def test_run_scenario_robust():
+    config = {'mode':'robust', 'n_scenarios':200, 'start_dt':'2019-03-01 00:00:00+00:00', 'end_dt':'2019-03-01 23:00:00+00:00'}
+    result = run_scenario(config, mock_moer_df())
+    assert 33 <= result['average_temp'] <= 43
+    assert result['p5_co2_lbs'] < result['expected_co2_lbs'] < result['p95_co2_lbs']
+    assert result['mean_violation_prob'] <= 0.05
+
+def test_run_scenario_cache_after_early_stop(tmp_path):
+    config = {'mode':'baseline', 'start_dt':'2019-03-01 00:00:00+00:00', 'end_dt':'2019-03-01 23:00:00+00:00'}
+    uncached = run_scenario(config, mock_moer_df())
+    stopped = run_scenario(dict(config, max_co2_lbs=uncached['total_co2_lbs']/4, cache_dir=str(tmp_path)), mock_moer_df())
+    assert stopped['stopped_early']
+    #the capped run only cached the hours it simulated, the uncapped run simulates the rest
+    result = run_scenario(dict(config, cache_dir=str(tmp_path)), mock_moer_df())
+    assert not result['stopped_early']
+    assert np.isclose(result['total_co2_lbs'], uncached['total_co2_lbs'])
+    assert result['run_time_min'] == uncached['run_time_min']
+    assert result['average_temp'] == uncached['average_temp']
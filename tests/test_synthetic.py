@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+from src.synthetic import *
+from src.utils import *
+
+def test_synthetic_moer_df_length_and_resolution():
+    df = synthetic_moer_df(days=7)
+    assert len(df) == 7*288
+    assert (df.timestamp.diff().dropna() == pd.Timedelta('5min')).all()
+    assert str(df.timestamp.dt.tz) == 'UTC'
+    assert (df.MOER >= 0).all()
+
+def test_synthetic_moer_df_diurnal_shape():
+    df = synthetic_moer_df(days=28)
+    hourly = df.groupby(df.timestamp.dt.hour).MOER.mean()
+    assert hourly.idxmax() in [18, 19, 20]
+    assert hourly.max() - hourly.min() > 300
+
+def test_synthetic_moer_df_deterministic_and_preppable():
+    assert synthetic_moer_df(days=1).equals(synthetic_moer_df(days=1))
+    assert not synthetic_moer_df(days=1).equals(synthetic_moer_df(days=1, random_state=2))
+    df = prep_df(synthetic_moer_df(days=2), start_dt='2019-03-01 00:00:00+00:00', end_dt='2019-03-01 23:00:00+00:00')
+    assert len(df) == 288
@@ -0,0 +1,36 @@
+import pandas as pd
+import numpy as np
+from src.utils import *
+import pytest
+
+def mock_moer_df():
+    time_series = pd.date_range(start='2019-03-01 00:00:00+00:00', end='2019-03-01 23:55:00+00:00', freq='5min')
+    moer_mock_data = np.arange(len(time_series), dtype=float)
+    return pd.DataFrame({'timestamp':time_series.astype(str), 'MOER':moer_mock_data})
+
+def test_prep_df_forecast_matches_df():
+    df, forecast = prep_df(mock_moer_df(), start_dt='2019-03-01 01:00:00+00:00', end_dt='2019-03-01 20:00:00+00:00', return_forecast=True)
+    for i in pd.date_range(start='2019-03-01 01:00:00+00:00', end='2019-03-01 20:00:00+00:00', freq='h', tz='UTC'):
+        indexes = get_forecast_idxs(df, i, forecast_length=12)
+        assert get_forecast_idxs(forecast, i, forecast_length=12) == indexes
+        assert list(get_hr_forecast(forecast, indexes)) == list(get_hr_forecast(df, indexes))
+
+def test_forecast_window_is_view():
+    df, forecast = prep_df(mock_moer_df(), start_dt='2019-03-01 00:00:00+00:00', end_dt='2019-03-01 23:00:00+00:00', return_forecast=True)
+    window = forecast.window('2019-03-01 02:00:00+00:00', 12)
+    assert np.shares_memory(window, forecast.moer)
+    assert list(window) == list(range(24, 36))
+    with pytest.raises(ValueError):
+        window[0] = 1
+
+def test_forecast_gaps_and_timezones():
+    df = mock_moer_df().drop(index=[3,4]).reset_index(drop=True)
+    forecast = MOERForecast(df)
+    assert forecast.position('2019-03-01 00:25:00+00:00') == 3
+    #same instant given in another timezone, and naive timestamps are UTC
+    assert forecast.position(pd.Timestamp('2019-02-28 16:25:00-08:00')) == 3
+    assert forecast.position('2019-03-01 00:25:00') == 3
+    with pytest.raises(KeyError):
+        forecast.position('2019-03-01 00:15:00+00:00')
+    with pytest.raises(KeyError):
+        forecast.position('2019-03-01 00:27:00+00:00')